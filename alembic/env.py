@@ -7,6 +7,7 @@ from alembic import context
 from config.db import SQLALCHEMY_DATABASE_URL, Base
 from src.contacts.models import Contact
 from src.auth.models import User
+from src.admin.models import StatsRefreshLog
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,95 @@
+"""Add stats materialized views
+
+Revision ID: 05acf7852ce0
+Revises: 6dd319a897fa
+Create Date: 2026-10-19 16:31:05.117392
+
+Every view has a unique index, which REFRESH MATERIALIZED VIEW CONCURRENTLY
+requires.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "05acf7852ce0"
+down_revision: Union[str, None] = "6dd319a897fa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VIEWS = {
+    # Users by order of magnitude of their live contacts: 0, 1-9, 10-99, ...
+    "stats_contacts_per_user": (
+        "bucket",
+        """
+        SELECT CASE WHEN contacts = 0 THEN 0
+                    ELSE power(10, floor(log(contacts)))::bigint END AS bucket,
+               count(*) AS users,
+               sum(contacts)::bigint AS contacts,
+               max(contacts) AS max_contacts
+        FROM (
+            SELECT users.id, count(contacts.id) AS contacts
+            FROM users
+            LEFT JOIN contacts
+                ON contacts.owner_id = users.id AND contacts.deleted_at IS NULL
+            GROUP BY users.id
+        ) AS per_user
+        GROUP BY 1
+        """,
+    ),
+    "stats_birthdays_per_month": (
+        "month",
+        """
+        SELECT extract(month FROM birthday)::int AS month, count(*) AS contacts
+        FROM contacts
+        WHERE deleted_at IS NULL
+        GROUP BY 1
+        """,
+    ),
+    "stats_users_by_status": (
+        "is_active",
+        """
+        SELECT coalesce(is_active, false) AS is_active, count(*) AS users
+        FROM users
+        GROUP BY 1
+        """,
+    ),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_refresh_log",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("view_name", sa.String(), nullable=False),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_stats_refresh_log_view_name_refreshed_at",
+        "stats_refresh_log",
+        ["view_name", "refreshed_at"],
+        unique=False,
+    )
+    for name, (key, query) in VIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {name} AS {query}")
+        op.execute(f"CREATE UNIQUE INDEX ix_{name}_{key} ON {name} ({key})")
+
+
+def downgrade() -> None:
+    for name in VIEWS:
+        op.execute(f"DROP MATERIALIZED VIEW {name}")
+    op.drop_index(
+        "ix_stats_refresh_log_view_name_refreshed_at", table_name="stats_refresh_log"
+    )
+    op.drop_table("stats_refresh_log")
@@ -0,0 +1,70 @@
+"""Add contact sync columns
+
+Revision ID: 6cd639d77cc4
+Revises: fe3809cfb608
+Create Date: 2026-10-19 11:37:52.164409
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6cd639d77cc4"
+down_revision: Union[str, None] = "fe3809cfb608"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "contacts",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "contacts",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "contacts", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    # Tombstones keep their email, so uniqueness only applies to live contacts.
+    op.drop_constraint("contacts_owner_id_email_key", "contacts", type_="unique")
+    op.create_index(
+        "ix_contacts_owner_id_email",
+        "contacts",
+        ["owner_id", "email"],
+        unique=True,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "ix_contacts_owner_id_updated_at_id",
+        "contacts",
+        ["owner_id", "updated_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM contacts WHERE deleted_at IS NOT NULL")
+    op.drop_index("ix_contacts_owner_id_updated_at_id", table_name="contacts")
+    op.drop_index("ix_contacts_owner_id_email", table_name="contacts")
+    op.create_unique_constraint(
+        "contacts_owner_id_email_key", "contacts", ["owner_id", "email"]
+    )
+    op.drop_column("contacts", "deleted_at")
+    op.drop_column("contacts", "updated_at")
+    op.drop_column("contacts", "created_at")
@@ -0,0 +1,120 @@
+"""Add contact phone_e164
+
+Revision ID: 6dd319a897fa
+Revises: eff3f7d4e103
+Create Date: 2026-10-19 15:48:30.271954
+
+Existing rows are backfilled in keyset-ordered batches, each committed on its
+own so the migration never holds row locks on more than one batch. The batch
+size can be set with ``alembic -x phone_backfill_batch=10000 upgrade head``.
+An interrupted backfill resumes where it stopped, since only rows whose
+phone_e164 is still NULL are read.
+
+The normalization is a frozen copy of ``src.contacts.normalize.to_e164`` as
+of this revision, so later changes to the app can't change what it writes.
+
+"""
+
+import re
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6dd319a897fa"
+down_revision: Union[str, None] = "eff3f7d4e103"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+contacts = sa.table(
+    "contacts",
+    sa.column("owner_id", sa.Integer),
+    sa.column("id", sa.Integer),
+    sa.column("phone_number", sa.String),
+    sa.column("phone_e164", sa.String),
+)
+
+COUNTRY_CODE = "380"
+_NON_DIGIT = re.compile(r"\D")
+
+
+def to_e164(phone: str | None, country_code: str) -> str | None:
+    if not phone:
+        return None
+    stripped = phone.strip()
+    digits = _NON_DIGIT.sub("", stripped)
+    if stripped.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        pass
+    else:
+        digits = country_code + digits.removeprefix("0")
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return f"+{digits}"
+
+
+def batch_size() -> int:
+    value = context.get_x_argument(as_dictionary=True).get("phone_backfill_batch")
+    return int(value) if value else 5000
+
+
+def backfill(bind, size: int) -> None:
+    after = (0, 0)
+    while True:
+        rows = bind.execute(
+            sa.select(contacts.c.owner_id, contacts.c.id, contacts.c.phone_number)
+            .where(
+                contacts.c.phone_e164.is_(None),
+                sa.tuple_(contacts.c.owner_id, contacts.c.id) > after,
+            )
+            .order_by(contacts.c.owner_id, contacts.c.id)
+            .limit(size)
+        ).all()
+        if not rows:
+            return
+        after = (rows[-1].owner_id, rows[-1].id)
+        values = [
+            (row.owner_id, row.id, phone)
+            for row in rows
+            if (phone := to_e164(row.phone_number, COUNTRY_CODE))
+        ]
+        if values:
+            # One UPDATE ... FROM (VALUES ...) per batch.
+            batch = sa.values(
+                sa.column("owner_id", sa.Integer),
+                sa.column("id", sa.Integer),
+                sa.column("phone", sa.String),
+                name="batch",
+            ).data(values)
+            bind.execute(
+                contacts.update()
+                .where(
+                    contacts.c.owner_id == batch.c.owner_id,
+                    contacts.c.id == batch.c.id,
+                )
+                .values(phone_e164=batch.c.phone)
+            )
+
+
+def upgrade() -> None:
+    op.add_column("contacts", sa.Column("phone_e164", sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        backfill(op.get_bind(), batch_size())
+    # Built after the backfill so the updates don't have to maintain it.
+    op.create_index(
+        "ix_contacts_owner_id_phone_e164",
+        "contacts",
+        ["owner_id", "phone_e164"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contacts_owner_id_phone_e164", table_name="contacts")
+    op.drop_column("contacts", "phone_e164")
@@ -0,0 +1,151 @@
+"""Partition contacts by owner_id
+
+Revision ID: bb1886f57b59
+Revises: 28f5f80e6648
+Create Date: 2026-10-19 09:12:41.518203
+
+The partition count defaults to ``settings.contacts_partitions`` and can be
+overridden per run with ``alembic -x contacts_partitions=32 upgrade head``.
+Changing it later means running downgrade/upgrade of this revision again.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from config.general import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bb1886f57b59"
+down_revision: Union[str, None] = "28f5f80e6648"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, first_name, last_name, email, phone_number, birthday, "
+    "additional_info, owner_id"
+)
+
+
+def partition_count() -> int:
+    value = context.get_x_argument(as_dictionary=True).get("contacts_partitions")
+    count = int(value) if value else settings.contacts_partitions
+    if count < 1:
+        raise ValueError("contacts_partitions must be a positive integer")
+    return count
+
+
+def create_contact_indexes() -> None:
+    # Indexes created on the partitioned parent are cascaded to every partition.
+    op.create_index(op.f("ix_contacts_email"), "contacts", ["email"], unique=False)
+    op.create_index(
+        op.f("ix_contacts_first_name"), "contacts", ["first_name"], unique=False
+    )
+    op.create_index(op.f("ix_contacts_id"), "contacts", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_contacts_last_name"), "contacts", ["last_name"], unique=False
+    )
+    op.create_index(
+        op.f("ix_contacts_phone_number"), "contacts", ["phone_number"], unique=False
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    orphans = bind.execute(
+        sa.text("SELECT count(*) FROM contacts WHERE owner_id IS NULL")
+    ).scalar()
+    if orphans:
+        raise RuntimeError(
+            f"{orphans} contacts have no owner_id; assign or delete them before "
+            "partitioning by owner_id"
+        )
+
+    partitions = partition_count()
+    op.create_table(
+        "contacts_partitioned",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('contacts_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("birthday", sa.Date(), nullable=False),
+        sa.Column("additional_info", sa.String(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("owner_id", "id", name="contacts_partitioned_pkey"),
+        sa.UniqueConstraint(
+            "owner_id", "email", name="contacts_partitioned_owner_id_email_key"
+        ),
+        postgresql_partition_by="HASH (owner_id)",
+    )
+    for remainder in range(partitions):
+        op.execute(
+            f"CREATE TABLE contacts_p{remainder} PARTITION OF contacts_partitioned "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+
+    op.execute(
+        f"INSERT INTO contacts_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM contacts"
+    )
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts_partitioned.id")
+    op.drop_table("contacts")
+    op.rename_table("contacts_partitioned", "contacts")
+    op.execute(
+        "ALTER TABLE contacts RENAME CONSTRAINT contacts_partitioned_pkey "
+        "TO contacts_pkey"
+    )
+    op.execute(
+        "ALTER TABLE contacts RENAME CONSTRAINT "
+        "contacts_partitioned_owner_id_email_key TO contacts_owner_id_email_key"
+    )
+    create_contact_indexes()
+    op.execute("ANALYZE contacts")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "contacts_heap",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('contacts_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("birthday", sa.Date(), nullable=False),
+        sa.Column("additional_info", sa.String(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id", name="contacts_heap_pkey"),
+    )
+    op.execute(f"INSERT INTO contacts_heap ({COLUMNS}) SELECT {COLUMNS} FROM contacts")
+    op.execute("ALTER SEQUENCE contacts_id_seq OWNED BY contacts_heap.id")
+    # Dropping the partitioned parent drops every contacts_p<N> partition too.
+    op.drop_table("contacts")
+    op.rename_table("contacts_heap", "contacts")
+    op.execute(
+        "ALTER TABLE contacts RENAME CONSTRAINT contacts_heap_pkey TO contacts_pkey"
+    )
+    op.create_index(op.f("ix_contacts_email"), "contacts", ["email"], unique=True)
+    op.create_index(
+        op.f("ix_contacts_first_name"), "contacts", ["first_name"], unique=False
+    )
+    op.create_index(op.f("ix_contacts_id"), "contacts", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_contacts_last_name"), "contacts", ["last_name"], unique=False
+    )
+    op.create_index(
+        op.f("ix_contacts_phone_number"), "contacts", ["phone_number"], unique=False
+    )
@@ -0,0 +1,51 @@
+"""Add contact duplicates
+
+Revision ID: eff3f7d4e103
+Revises: 6cd639d77cc4
+Create Date: 2026-10-19 15:02:11.804113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "eff3f7d4e103"
+down_revision: Union[str, None] = "6cd639d77cc4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "contact_duplicates",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column("duplicate_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("reasons", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id", "contact_id"],
+            ["contacts.owner_id", "contacts.id"],
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id", "duplicate_id"],
+            ["contacts.owner_id", "contacts.id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "contact_id", "duplicate_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("contact_duplicates")
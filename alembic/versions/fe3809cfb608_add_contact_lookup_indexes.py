@@ -0,0 +1,39 @@
+"""Add contact lookup indexes
+
+Revision ID: fe3809cfb608
+Revises: bb1886f57b59
+Create Date: 2026-10-19 10:04:17.902546
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fe3809cfb608"
+down_revision: Union[str, None] = "bb1886f57b59"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_contacts_owner_id_first_name",
+        "contacts",
+        ["owner_id", "first_name"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_contacts_owner_id_full_name",
+        "contacts",
+        ["owner_id", sa.text("(first_name || ' ' || last_name)")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contacts_owner_id_full_name", table_name="contacts")
+    op.drop_index("ix_contacts_owner_id_first_name", table_name="contacts")
@@ -0,0 +1,120 @@
+"""Fault injection for the circuit breakers, using local stand-ins only.
+
+* rate limiter - ``FastAPILimiter`` pointed at a TCP server that accepts
+  connections and never answers, i.e. a hung Redis;
+* smtp - a ``send_message`` stand-in that never returns;
+* cloudinary - an upload stand-in that fails after its timeout.
+
+For each dependency it prints the latency of consecutive calls and the
+breaker state after each one: calls should cost about the timeout until the
+breaker opens and nothing afterwards, with requests still admitted by the
+fail-open rate limiter. Redis, SMTP and Cloudinary are never contacted:
+
+    python -m benchmarks.circuit_breakers --calls 8
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+from fastapi_limiter import FastAPILimiter
+from redis.asyncio import Redis
+
+from src.core.resilience import (
+    CircuitBreaker,
+    CircuitOpen,
+    FailOpenRateLimiter,
+    rate_limit_breaker,
+)
+
+
+def black_hole() -> socket.socket:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(100)  # Connections complete in the backlog, nobody reads them.
+    return sock
+
+
+def report(name: str, call: int, elapsed: float, outcome: str, state: str) -> None:
+    print(f"{name:12} {call:5} {elapsed * 1000:10.1f} {outcome:>16} {state:>10}")
+
+
+async def rate_limiter(calls: int) -> None:
+    server = black_hole()
+    FastAPILimiter.redis = Redis(
+        port=server.getsockname()[1], socket_timeout=5, socket_connect_timeout=5
+    )
+    limiter = FailOpenRateLimiter(times=1, seconds=60)
+    for call in range(1, calls + 1):
+        started = time.perf_counter()
+        pexpire = await limiter._check("benchmark:key")
+        outcome = "allowed" if pexpire == 0 else "limited"
+        report(
+            "rate_limit",
+            call,
+            time.perf_counter() - started,
+            outcome,
+            rate_limit_breaker.state,
+        )
+    server.close()
+
+
+async def smtp(calls: int, breaker: CircuitBreaker) -> None:
+    async def send_message(message):
+        await asyncio.Event().wait()
+
+    for call in range(1, calls + 1):
+        started = time.perf_counter()
+        try:
+            await breaker.call_async(send_message, "message")
+            outcome = "sent"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except CircuitOpen:
+            outcome = "failed fast"
+        report("smtp", call, time.perf_counter() - started, outcome, breaker.state)
+
+
+def cloudinary(calls: int, breaker: CircuitBreaker) -> None:
+    def upload(file, timeout):
+        time.sleep(timeout)
+        raise TimeoutError("upload timed out")
+
+    for call in range(1, calls + 1):
+        started = time.perf_counter()
+        try:
+            breaker.call(upload, b"image", timeout=breaker.timeout)
+            outcome = "uploaded"
+        except TimeoutError:
+            outcome = "timeout"
+        except CircuitOpen:
+            outcome = "failed fast"
+        report(
+            "cloudinary", call, time.perf_counter() - started, outcome, breaker.state
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=0.2)
+    parser.add_argument("--failure-threshold", type=int, default=3)
+    args = parser.parse_args()
+
+    rate_limit_breaker.timeout = args.timeout
+    rate_limit_breaker.failure_threshold = args.failure_threshold
+
+    def breaker(name):
+        return CircuitBreaker(
+            name, args.timeout, failure_threshold=args.failure_threshold
+        )
+
+    print(f"{'dependency':12} {'call':>5} {'ms':>10} {'outcome':>16} {'state':>10}")
+    asyncio.run(rate_limiter(args.calls))
+    asyncio.run(smtp(args.calls, breaker("smtp_stand_in")))
+    cloudinary(args.calls, breaker("cloudinary_stand_in"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Bytes on the wire and CPU per response for contact pages.
+
+Encodes a synthetic page with every format/encoding combination the API can
+negotiate and reports the payload size and the CPU time spent producing it
+(serialization plus compression, best of ``--repeat``):
+
+    python -m benchmarks.compression --rows 1000
+"""
+
+import argparse
+import time
+
+from benchmarks.serialization import make_page
+from src.contacts.serializers import contacts_response
+from src.core.compression import build_encodings
+from src.core.negotiation import msgpack
+
+ENCODINGS = build_encodings(gzip_level=5, brotli_quality=4)
+
+
+def encode(rows, media_format: str, encoding: str | None) -> bytes:
+    body = contacts_response(rows, msgpack_format=media_format == "msgpack").body
+    if encoding is None:
+        return body
+    factory, level, _ = ENCODINGS[encoding]
+    compressor = factory(level)
+    return compressor.compress(body) + compressor.finish()
+
+
+def measure(rows, media_format: str, encoding: str | None, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        payload = encode(rows, media_format, encoding)
+        best = min(best, time.process_time() - started)
+    return len(payload), best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    formats = ["json"] + (["msgpack"] if msgpack is not None else [])
+    print(f"{'rows':>6} {'format':>8} {'encoding':>9} {'bytes':>10} {'cpu ms':>8}")
+    for size in args.rows:
+        _, rows = make_page(size)
+        for media_format in formats:
+            for encoding in [None, *ENCODINGS]:
+                length, cpu = measure(rows, media_format, encoding, args.repeat)
+                print(
+                    f"{size:>6} {media_format:>8} {encoding or 'identity':>9} "
+                    f"{length:>10} {cpu * 1000:>8.2f}"
+                )
@@ -0,0 +1,106 @@
+"""Partition pruning benchmark for the contacts table.
+
+Seeds a database (``DATABASE_URL``) with synthetic users and contacts and
+times the owner-scoped queries used by ``ContactsRepository``. Run it once on
+a database migrated to ``28f5f80e6648`` (single heap table) and once after
+``bb1886f57b59`` (hash partitions) to compare:
+
+    python -m benchmarks.contacts_partitioning --rows 10000000 --users 50000
+
+Use ``--skip-seed`` to re-run the queries against already seeded data.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from config.db import engine
+
+SEED_USERS = text(
+    """
+    INSERT INTO users (username, email, hashed_password, is_active)
+    SELECT 'bench_' || g, 'bench_' || g || '@example.com', 'x', true
+    FROM generate_series(1, :users) AS g
+    ON CONFLICT DO NOTHING
+    """
+)
+
+SEED_CONTACTS = text(
+    """
+    INSERT INTO contacts
+        (first_name, last_name, email, phone_number, birthday, owner_id)
+    SELECT 'first_' || (g % 5000), 'last_' || (g % 7919),
+           'contact_' || g || '@example.com', '+38067' || lpad((g % 10000000)::text, 7, '0'),
+           date '1970-01-01' + (g % 18000), u.id
+    FROM generate_series(1, :rows) AS g
+    JOIN users AS u ON u.username = 'bench_' || (1 + g % :users)
+    """
+)
+
+QUERIES = {
+    "get_contacts": "SELECT * FROM contacts WHERE owner_id = :owner_id LIMIT 10",
+    "get_contact_by_id_and_owner": (
+        "SELECT * FROM contacts WHERE owner_id = :owner_id AND id = :contact_id"
+    ),
+    "search_contacts": (
+        "SELECT * FROM contacts WHERE owner_id = :owner_id "
+        "AND (first_name ILIKE '%1%' OR last_name ILIKE '%1%')"
+    ),
+}
+
+
+def seed(rows: int, users: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(SEED_USERS, {"users": users})
+        conn.execute(SEED_CONTACTS, {"rows": rows, "users": users})
+        conn.execute(text("ANALYZE users"))
+        conn.execute(text("ANALYZE contacts"))
+
+
+def run(iterations: int) -> None:
+    with engine.connect() as conn:
+        owners = (
+            conn.execute(
+                text("SELECT id FROM users WHERE username LIKE 'bench_%' LIMIT 1000")
+            )
+            .scalars()
+            .all()
+        )
+        contact_ids = conn.execute(
+            text("SELECT owner_id, id FROM contacts LIMIT 1000")
+        ).all()
+        for name, sql in QUERIES.items():
+            plan = (
+                conn.execute(
+                    text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"),
+                    {"owner_id": owners[0], "contact_id": contact_ids[0].id},
+                )
+                .scalars()
+                .all()
+            )
+            scanned = sum("Scan" in line and " on contacts" in line for line in plan)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                owner_id, contact_id = random.choice(contact_ids)
+                conn.execute(
+                    text(sql), {"owner_id": owner_id, "contact_id": contact_id}
+                ).all()
+            elapsed = (time.perf_counter() - started) / iterations
+            print(
+                f"{name:<30} {elapsed * 1000:8.3f} ms/query  "
+                f"relations scanned: {scanned}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+    if not args.skip_seed:
+        seed(args.rows, args.users)
+    run(args.iterations)
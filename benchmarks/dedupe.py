@@ -0,0 +1,108 @@
+"""Throughput of duplicate detection on one large owner, without a database.
+
+Generates ``--contacts`` synthetic contacts of a single owner, a share of them
+near-duplicates of another contact (case, accents, swapped names, phone
+formatting, plus-addressed email, one-letter typos), and times
+``find_duplicates`` on them. Reports contacts/s, the pairs actually compared
+against the n² of a naive scan, and how many injected duplicates were found:
+
+    python -m benchmarks.dedupe --contacts 100000
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from src.contacts import dedupe
+
+Row = namedtuple("Row", "id first_name last_name email phone_number birthday")
+
+FIRST = ["Olena", "Andrii", "Maria", "John", "Anna", "Jose", "Zoe", "Ivan", "Li"]
+LAST = ["Kovalenko", "Smith", "Garcia", "Müller", "Nguyen", "Shevchenko", "Brown"]
+
+
+def random_contact(contact_id: int, rng: random.Random) -> Row:
+    first = rng.choice(FIRST) + rng.choice(["", "a", "o", "ie", "n"])
+    last = rng.choice(LAST) + "".join(rng.choices("abcdefghij", k=3))
+    return Row(
+        contact_id,
+        first,
+        last,
+        f"{first}.{last}{contact_id}@example.com".lower(),
+        f"+38067{rng.randrange(10**7):07d}",
+        date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 45)),
+    )
+
+
+def near_duplicate(contact: Row, contact_id: int, rng: random.Random) -> Row:
+    first, last, email, phone = (
+        contact.first_name,
+        contact.last_name,
+        contact.email,
+        contact.phone_number,
+    )
+    variant = rng.randrange(4)
+    if variant == 0:
+        first, last = last.upper(), first  # Swapped and shouting.
+    elif variant == 1:
+        position = rng.randrange(1, len(last))
+        last = last[:position] + "x" + last[position + 1 :]  # Typo.
+        email = f"x{contact_id}@example.org"
+    elif variant == 2:
+        local, domain = email.split("@")
+        email = f"{local.upper()}+work@{domain}"
+    digits = phone[-10:]
+    phone = f"({digits[:3]}) {digits[3:6]}-{digits[6:8]}-{digits[8:]}"
+    return Row(contact_id, first, last, email, phone, contact.birthday)
+
+
+def generate(count: int, duplicate_share: float, seed: int = 0):
+    rng = random.Random(seed)
+    rows, injected = [], set()
+    for contact_id in range(1, count + 1):
+        if rows and rng.random() < duplicate_share:
+            original = rng.choice(rows)
+            rows.append(near_duplicate(original, contact_id, rng))
+            injected.add((original.id, contact_id))
+        else:
+            rows.append(random_contact(contact_id, rng))
+    return rows, injected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--duplicate-share", type=float, default=0.05)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--max-block", type=int, default=500)
+    args = parser.parse_args()
+
+    rows, injected = generate(args.contacts, args.duplicate_share)
+
+    compared = 0
+    score_block = dedupe.score_block
+
+    def counting_score_block(block, threshold):
+        nonlocal compared
+        compared += len(block) * (len(block) - 1) // 2
+        return score_block(block, threshold)
+
+    dedupe.score_block = counting_score_block
+    started = time.perf_counter()
+    pairs = dedupe.find_duplicates(rows, args.threshold, args.max_block)
+    elapsed = time.perf_counter() - started
+    dedupe.score_block = score_block
+
+    found = len(injected & pairs.keys())
+    naive = args.contacts * (args.contacts - 1) // 2
+    print(f"contacts:        {args.contacts}")
+    print(f"time:            {elapsed:.2f}s ({args.contacts / elapsed:.0f} contacts/s)")
+    print(f"pairs compared:  {compared} ({compared / naive:.5%} of {naive})")
+    print(f"candidates:      {len(pairs)}")
+    print(f"injected found:  {found}/{len(injected)} ({found / len(injected):.1%})")
+
+
+if __name__ == "__main__":
+    main()
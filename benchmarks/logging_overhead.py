@@ -0,0 +1,172 @@
+"""Request throughput and latency with logging disabled, synchronous or queued.
+
+Drives a small ASGI app in-process (no sockets) whose endpoint logs a couple
+of records per request, the way the auth routes do:
+
+* ``disabled`` - root level above anything the endpoint logs;
+* ``sync`` - a JSON ``StreamHandler`` writing from the request path;
+* ``queue`` - ``setup_logging``: ``QueueHandler`` plus a listener thread.
+
+Each mode runs in a fresh interpreter since logging is configured per
+process. With a fast local file the queue mostly adds thread hand-off and
+GIL contention; ``--write-delay-ms`` makes every write block, like stderr
+piped into a slow log collector, which is where the queue pays off:
+
+    python -m benchmarks.logging_overhead --requests 20000 --write-delay-ms 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+from fastapi import FastAPI
+
+from src.core.log import (
+    JsonFormatter,
+    RequestIdMiddleware,
+    setup_logging,
+    stop_logging,
+)
+
+MODES = ("disabled", "sync", "queue")
+
+logger = logging.getLogger("benchmarks.logging_overhead")
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/contacts/{contact_id}")
+    async def read_contact(contact_id: int):
+        logger.info("Reading contact %s", contact_id)
+        logger.info("Contact %s served", contact_id, extra={"owner_id": 1})
+        return {"id": contact_id}
+
+    app.add_middleware(RequestIdMiddleware)
+    return app
+
+
+class SlowStream:
+    def __init__(self, stream, delay: float):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def configure(mode: str, output) -> None:
+    if mode == "queue":
+        setup_logging("INFO", stream=output)
+        return
+    root = logging.getLogger()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(logging.INFO if mode == "sync" else logging.CRITICAL)
+
+
+async def call(app, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def drive(app, requests: int, concurrency: int) -> list[float]:
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client():
+        for i in counter:
+            started = time.perf_counter()
+            await call(app, f"/contacts/{i}")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+def run_mode(args) -> None:
+    with open(args.output, "a") as output:
+        if args.write_delay_ms:
+            output = SlowStream(output, args.write_delay_ms / 1000)
+        configure(args.mode, output)
+        app = build_app()
+        asyncio.run(drive(app, 200, args.concurrency))  # Warm up.
+        started = time.perf_counter()
+        latencies = asyncio.run(drive(app, args.requests, args.concurrency))
+        elapsed = time.perf_counter() - started
+        stop_logging()  # Drain the queue before the file is closed.
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        json.dumps(
+            {
+                "rps": args.requests / elapsed,
+                "p50_ms": quantiles[49] * 1000,
+                "p99_ms": quantiles[98] * 1000,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", default="/tmp/logging_overhead.log")
+    parser.add_argument("--write-delay-ms", type=float, default=0)
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    print(f"{'mode':>10} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for mode in MODES:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.logging_overhead", "--mode", mode]
+            + ["--requests", str(args.requests)]
+            + ["--concurrency", str(args.concurrency), "--output", args.output]
+            + ["--write-delay-ms", str(args.write_delay_ms)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        stats = json.loads(result.stdout)
+        print(
+            f"{mode:>10} {stats['rps']:10.0f} "
+            f"{stats['p50_ms']:10.3f} {stats['p99_ms']:10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Serialization cost of contact list pages, default path vs fast path.
+
+The default path mirrors what FastAPI does for ``response_model=
+list[ContactsResponse]``: validate ORM objects from attributes, dump to
+JSON-able Python and encode with the stdlib ``json`` module. The fast path
+encodes ``CONTACT_ROW_COLUMNS`` tuples directly (``fast_json_responses``).
+No database is needed:
+
+    python -m benchmarks.serialization --sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from src.contacts.schemas import ContactsResponse
+from src.contacts.serializers import contacts_response
+
+adapter = TypeAdapter(list[ContactsResponse])
+
+
+def make_page(size: int):
+    owner = SimpleNamespace(username="owner", email="owner@example.com")
+    objects, rows = [], []
+    for i in range(size):
+        values = (
+            f"First{i}",
+            f"Last{i}",
+            f"contact{i}@example.com",
+            f"+38067{i:07d}",
+            date(1980, 1, 1) + timedelta(days=i % 15000),
+            None if i % 3 else "met at the conference",
+            i,
+        )
+        objects.append(
+            SimpleNamespace(
+                first_name=values[0],
+                last_name=values[1],
+                email=values[2],
+                phone_number=values[3],
+                birthday=values[4],
+                additional_info=values[5],
+                id=values[6],
+                owner=owner,
+            )
+        )
+        rows.append((*values, owner.username, owner.email))
+    return objects, rows
+
+
+def default_path(objects) -> bytes:
+    validated = adapter.validate_python(objects, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(rows) -> bytes:
+    return contacts_response(rows).body
+
+
+def timeit(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'rows':>7} {'default ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        objects, rows = make_page(size)
+        assert json.loads(default_path(objects)) == json.loads(fast_path(rows))
+        slow = timeit(default_path, objects, args.repeat)
+        fast = timeit(fast_path, rows, args.repeat)
+        print(
+            f"{size:>7} {slow * 1000:>11.2f} {fast * 1000:>9.2f} {slow / fast:>7.1f}x"
+        )
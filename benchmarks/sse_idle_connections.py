@@ -0,0 +1,80 @@
+"""Idle connection load test for ``GET /contacts/events``.
+
+Opens ``--connections`` event streams against a running server, keeps them
+idle for ``--hold`` seconds and reports how many stayed connected and how many
+heartbeats/events arrived. Run it against a single worker and watch the
+worker's RSS and CPU while the connections are held:
+
+    python -m benchmarks.sse_idle_connections --token <access token> \\
+        --connections 5000 --hold 60
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+async def hold_stream(host, port, path, token, hold, stats):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats["failed"] += 1
+        return
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    if b" 200 " not in status_line:
+        stats["failed"] += 1
+        writer.close()
+        return
+    stats["connected"] += 1
+    deadline = time.monotonic() + hold
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            line = await asyncio.wait_for(reader.readline(), timeout=remaining)
+            if not line:
+                stats["dropped"] += 1
+                return
+            if line.startswith(b": ping"):
+                stats["heartbeats"] += 1
+            elif line.startswith(b"event:"):
+                stats["events"] += 1
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+
+
+async def main(args):
+    url = urlsplit(args.url)
+    stats = dict(connected=0, failed=0, dropped=0, heartbeats=0, events=0)
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(args.connections):
+        tasks.append(
+            asyncio.create_task(
+                hold_stream(
+                    url.hostname, url.port or 80, url.path, args.token, args.hold, stats
+                )
+            )
+        )
+        await asyncio.sleep(1 / args.rate)
+    ramp_up = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+    print(f"ramp-up: {ramp_up:.1f}s for {args.connections} connections")
+    for key, value in stats.items():
+        print(f"{key:>10}: {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/contacts/events")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500, help="new connections/s")
+    parser.add_argument("--hold", type=float, default=60)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,64 @@
+"""Cold-start import cost of the app, checked against a budget.
+
+Imports ``main`` in fresh interpreters with ``-X importtime``, prints the
+slowest modules by cumulative time from the best run and exits with status 1
+when the total exceeds ``--budget-ms``:
+
+    python -m benchmarks.startup_time --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+def import_times(module: str) -> list[tuple[int, str, int]]:
+    """Returns ``(depth, module, cumulative microseconds)`` in report order."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((depth, name.strip(), int(cumulative)))
+    return times
+
+
+def total_us(times, module: str) -> int:
+    return next(us for depth, name, us in times if depth == 0 and name == module)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    # Take the fastest run: the others mostly measure a cold page cache.
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: total_us(times, args.module))
+    total_ms = total_us(best, args.module) / 1000
+
+    # Modules imported directly by the app, i.e. one level below it.
+    direct = [(name, us) for depth, name, us in best if depth == 1]
+    print(f"{'module':40} {'cumulative ms':>14}")
+    for name, us in sorted(direct, key=lambda item: -item[1])[: args.top]:
+        print(f"{name:40} {us / 1000:14.1f}")
+    print(f"{'import ' + args.module:40} {total_ms:14.1f}")
+
+    if total_ms > args.budget_ms:
+        print(f"over budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print(f"within budget of {args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
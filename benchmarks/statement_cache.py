@@ -0,0 +1,158 @@
+"""Per-call cost of the hot repository queries, rebuilt vs. built once.
+
+For each query (user by email, a page of an owner's contacts, contact by id
+and owner) it runs the statement the repository used to build on every call
+(``rebuilt``) and the repository method, which executes a statement built
+at import time with bound parameters (``prebuilt``), and reports per call:
+
+* ``cpu us`` - process CPU time: statement construction, cache key
+  generation, compilation, driver and ORM work;
+* ``db us`` - wall time spent in cursor.execute, i.e. the round trip;
+* ``total us`` - wall time of the whole call.
+
+Postgres needs a migrated database, where a throwaway user and its contacts
+are created and removed afterwards; sqlite URLs get their tables created:
+
+    python -m benchmarks.statement_cache --url postgresql+psycopg2://localhost/contacts_bench
+"""
+
+import argparse
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import create_engine, delete, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from config.db import Base
+from src.auth.models import Role, User
+from src.auth.repo import UserRepository
+from src.contacts.models import Contact
+from src.contacts.repo import ContactsRepository, is_live
+
+
+def baseline_queries(session, email: str, owner_id: int, contact_id: int):
+    """The statements as they were built before, on every call."""
+    return {
+        "user by email": lambda: session.execute(
+            select(User).where(User.email == email)
+        ).scalar_one_or_none(),
+        "contacts by owner": lambda: session.execute(
+            select(Contact)
+            .where(Contact.owner_id == owner_id, is_live)
+            .limit(10)
+            .offset(0)
+        )
+        .scalars()
+        .all(),
+        "contact by id": lambda: session.execute(
+            select(Contact).where(
+                Contact.owner_id == owner_id, Contact.id == contact_id, is_live
+            )
+        ).scalar_one_or_none(),
+    }
+
+
+def repository_queries(session, email: str, owner_id: int, contact_id: int):
+    users, contacts = UserRepository(session), ContactsRepository(session)
+    return {
+        "user by email": lambda: users.get_user_by_email(email),
+        "contacts by owner": lambda: contacts.get_contacts(owner_id, 10, 0),
+        "contact by id": lambda: contacts.get_contact_by_id_and_owner(
+            owner_id, contact_id
+        ),
+    }
+
+
+def seed(engine, contacts: int) -> tuple[str, int, int]:
+    if engine.dialect.name == "sqlite":
+        Contact.__table__.c.id.autoincrement = False
+        Base.metadata.create_all(engine, tables=[Role.__table__, User.__table__])
+        Base.metadata.create_all(engine, tables=[Contact.__table__])
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    with engine.begin() as connection:
+        owner_id = connection.execute(
+            insert(User)
+            .values(username=email, email=email, hashed_password="x", is_active=True)
+            .returning(User.id)
+        ).scalar()
+        first_id = 2**31 - contacts - 1
+        connection.execute(
+            insert(Contact),
+            [
+                {
+                    "id": first_id + i,
+                    "owner_id": owner_id,
+                    "first_name": f"First{i}",
+                    "last_name": f"Last{i}",
+                    "email": f"contact{i}@example.com",
+                    "phone_number": f"+38067{i:07d}",
+                    "birthday": date(1990, 1, 1),
+                }
+                for i in range(contacts)
+            ],
+        )
+    return email, owner_id, first_id
+
+
+def cleanup(engine, owner_id: int) -> None:
+    with engine.begin() as connection:
+        connection.execute(delete(Contact).where(Contact.owner_id == owner_id))
+        connection.execute(delete(User).where(User.id == owner_id))
+
+
+def measure(engine, call, calls: int) -> tuple[float, float, float]:
+    db_time = 0.0
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._bench_started = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        nonlocal db_time
+        db_time += time.perf_counter() - context._bench_started
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(calls):
+        call()
+    cpu = time.process_time() - cpu_started
+    total = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", before)
+    event.remove(engine, "after_cursor_execute", after)
+    return cpu / calls * 1e6, db_time / calls * 1e6, total / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--contacts", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    email, owner_id, contact_id = seed(engine, args.contacts)
+    print(f"{'query':18} {'variant':9} {'cpu us':>9} {'db us':>9} {'total us':>9}")
+    try:
+        with sessionmaker(bind=engine)() as session:
+            variants = {
+                "rebuilt": baseline_queries(session, email, owner_id, contact_id),
+                "prebuilt": repository_queries(session, email, owner_id, contact_id),
+            }
+            for name in variants["rebuilt"]:
+                # Variants alternate and the best round counts, so background
+                # noise doesn't favour either of them.
+                best = {variant: (float("inf"),) * 3 for variant in variants}
+                for _ in range(args.rounds):
+                    for variant, queries in variants.items():
+                        result = measure(engine, queries[name], args.calls)
+                        best[variant] = tuple(map(min, best[variant], result))
+                for variant, (cpu, db, total) in best.items():
+                    print(f"{name:18} {variant:9} {cpu:9.1f} {db:9.1f} {total:9.1f}")
+    finally:
+        cleanup(engine, owner_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cost of tracing when it is off, sampled out, and sampling every request.
+
+First times a bare ``span()`` call outside any trace, which is what every
+instrumented call (bcrypt, SMTP, each SQL statement, ...) pays when its
+request isn't sampled. Then drives an in-process app whose endpoint opens
+five spans, under:
+
+* ``off`` - no exporter configured, the middleware passes requests through;
+* ``sampled out`` - exporter configured, sample rate 0;
+* ``sampled`` - every request traced and exported to ``--output``.
+
+    python -m benchmarks.tracing_overhead --requests 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+from fastapi import FastAPI
+
+from benchmarks.logging_overhead import drive
+from src.core.tracing import TracingMiddleware, setup_tracing, span
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/contacts/{contact_id}")
+    async def read_contact(contact_id: int):
+        for step in range(5):
+            with span("step", step=step):
+                pass
+        return {"id": contact_id}
+
+    app.add_middleware(TracingMiddleware)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", default="/tmp/tracing_overhead.jsonl")
+    args = parser.parse_args()
+
+    def noop():
+        pass
+
+    def traced_noop():
+        with span("noop"):
+            pass
+
+    number = 1_000_000
+    bare = min(timeit.repeat(noop, number=number, repeat=5)) / number
+    untraced = min(timeit.repeat(traced_noop, number=number, repeat=5)) / number
+    print(f"span() outside a trace: {(untraced - bare) * 1e9:.0f} ns per call\n")
+
+    app = build_app()
+    modes = (("off", 0.0, ""), ("sampled out", 0.0, args.output))
+    modes += (("sampled", 1.0, args.output),)
+    print(f"{'mode':>12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, rate, target in modes:
+        setup_tracing(rate, f"file:{target}" if target else "")
+        asyncio.run(drive(app, 200, args.concurrency))  # Warm up.
+        started = time.perf_counter()
+        latencies = asyncio.run(drive(app, args.requests, args.concurrency))
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name:>12} {args.requests / elapsed:10.0f} "
+            f"{quantiles[49] * 1000:10.3f} {quantiles[98] * 1000:10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
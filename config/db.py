@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
 from config.general import settings
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
@@ -10,10 +15,82 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Per-route budgets, keyed by endpoint name: "search_contacts=2000,...".
+STATEMENT_TIMEOUTS = {
+    name.strip(): int(ms)
+    for name, sep, ms in (
+        item.partition("=") for item in settings.statement_timeouts.split(",")
+    )
+    if sep
+}
+
+QUERY_CANCELED = "57014"  # Postgres SQLSTATE for timeouts and cancel requests.
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def set_statement_timeout(session, transaction, connection):
+    timeout = session.info.get("statement_timeout_ms")
+    if timeout and connection.dialect.name == "postgresql":
+        # SET LOCAL ends with the transaction, so pooled connections never
+        # carry one request's budget into the next.
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+    session.info["dbapi_connection"] = connection.connection.dbapi_connection
+    session.info["connection_info"] = connection.info
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def forget_connection(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("dbapi_connection", None)
+        session.info.pop("connection_info", None)
+
+
+# Cancelling is only useful while a statement runs; between statements it
+# would hit nothing, or the next request's statement on a pooled connection.
+@event.listens_for(engine, "before_cursor_execute")
+def statement_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_running"] = True
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def statement_finished(conn, cursor, statement, parameters, context, executemany):
+    conn.info["statement_running"] = False
+
+
+@event.listens_for(engine, "handle_error")
+def statement_failed(context):
+    if context.connection is not None:
+        context.connection.info["statement_running"] = False
+
+
+def route_name(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "name", None) or request.url.path
+
+
+async def cancel_on_disconnect(request: Request, db: Session) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+    connection = db.info.get("dbapi_connection")
+    running = db.info.get("connection_info", {}).get("statement_running")
+    if connection is None or not running or not hasattr(connection, "cancel"):
+        return
+    # Read by the OperationalError handler, which counts the cancellation
+    # once the statement actually fails with QUERY_CANCELED.
+    request.state.db_cancelled = True
+    # Asks the server to stop the running statement; blocks on a new socket.
+    await run_in_threadpool(connection.cancel)
+
 
-def get_db():
+async def get_db(request: Request):
     db = SessionLocal()
+    db.info["statement_timeout_ms"] = STATEMENT_TIMEOUTS.get(
+        route_name(request), settings.statement_timeout_ms
+    )
+    watcher = asyncio.create_task(cancel_on_disconnect(request, db))
     try:
         yield db
     finally:
-        db.close()
+        watcher.cancel()
+        # Closing rolls back over the network; keep it off the event loop.
+        await run_in_threadpool(db.close)
@@ -12,10 +12,46 @@ class Settings(BaseSettings):
     mail_server: str
     redis_host: str
     redis_port: int
+    redis_socket_timeout: float = 0.5
     origins: str
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    contacts_partitions: int = 16
+    sync_settle_seconds: float = 1.0
+    events_heartbeat_seconds: float = 15.0
+    fast_json_responses: bool = False
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 5
+    compression_brotli_quality: int = 4
+    compression_cpu_budget_ms: float = 5.0
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 means one worker per available CPU
+    server_max_requests: int = 0  # 0 disables worker recycling
+    server_max_requests_jitter: int = 0
+    server_graceful_timeout: float = 30.0
+    log_level: str = "INFO"
+    log_levels: str = ""  # e.g. "sqlalchemy.engine=INFO,src.auth=DEBUG"
+    log_json: bool = True
+    # Per worker "group=slots/queue"; keep the total near the DB pool size.
+    admission_limits: str = "auth=4/16,contacts_read=8/32,contacts_write=4/16,admin=2/4"
+    admission_max_wait_seconds: float = 2.0
+    statement_timeout_ms: int = 5000  # 0 disables the timeout
+    statement_timeouts: str = "search_contacts=2000,get_contacts_all=2000"
+    cloudinary_timeout: float = 10.0
+    smtp_timeout: float = 10.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    trace_exporter: str = ""  # "file:traces.jsonl" or "udp://host:port"; off if empty
+    trace_sample_rate: float = 0.0
+    profile_dir: str = "profiles"
+    profile_keep: int = 100
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 1.0
+    dedupe_threshold: float = 0.6
+    dedupe_max_block: int = 500
+    phone_country_code: str = "380"  # For numbers written without one.
 
     class Config:
         env_file = ".env"
@@ -23,4 +59,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from redis import Redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from config.general import settings
+
+
+@lru_cache
+def get_redis() -> Redis:
+    # Synchronous client for code running in the threadpool (repositories,
+    # sync dependencies). Short socket timeouts and no retries keep a slow
+    # Redis from stalling request workers; callers go through redis_breaker,
+    # which stops calling it altogether while it keeps failing.
+    return Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        retry=Retry(NoBackoff(), 0),
+    )
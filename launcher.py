@@ -0,0 +1,190 @@
+"""Pre-forking production launcher.
+
+The parent imports the app once, binds the listening socket and forks
+``settings.server_workers`` uvicorn workers (one per CPU by default) that
+share it. Workers are respawned when they exit, which together with
+``settings.server_max_requests`` recycles them to cap memory growth.
+
+Signals sent to the parent:
+
+* SIGTERM / SIGINT - stop accepting connections, let workers drain in-flight
+  requests for up to ``settings.server_graceful_timeout`` seconds, then exit.
+* SIGHUP - recycle workers one at a time.
+
+Run with ``python launcher.py``.
+"""
+
+import logging
+import os
+import random
+import signal
+import socket
+import time
+
+import uvicorn
+
+from config.general import settings
+from src.core.log import stop_logging
+
+logger = logging.getLogger("launcher")
+
+
+def worker_count() -> int:
+    if settings.server_workers > 0:
+        return settings.server_workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))  # Respects container CPU pinning.
+    return os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def after_fork() -> None:
+    # Pooled connections and Redis clients created in the parent must not be
+    # shared with the children: both ends would talk over the same socket.
+    from config.db import engine
+    from config.redis import get_redis
+    from src.contacts.cache import contact_versions
+
+    engine.dispose(close=False)
+    get_redis.cache_clear()
+    # Pending version bumps and the lock belong to the parent process.
+    contact_versions.reset()
+
+
+def run_worker(app, sock: socket.socket) -> int:
+    after_fork()
+    max_requests = settings.server_max_requests or None
+    if max_requests and settings.server_max_requests_jitter:
+        # Spread restarts so workers don't all recycle at the same moment.
+        max_requests += random.randint(0, settings.server_max_requests_jitter)
+    config = uvicorn.Config(
+        app,
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+        proxy_headers=True,
+        log_config=None,
+    )
+    server = uvicorn.Server(config)
+
+    def exit_gracefully(signum, frame) -> None:
+        server.should_exit = True
+
+    # uvicorn swaps in its own handlers while serving and, once drained,
+    # re-raises the signal against these. They must not kill the process:
+    # spawn() still has to flush the log queue on the way out.
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, exit_gracefully)
+    server.run(sockets=[sock])
+    return 0 if server.started else 3  # 3 is uvicorn's startup failure code.
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.children: dict[int, float] = {}
+        self.recycling: list[int] = []
+        self.draining: int | None = None
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # run_worker() installs the worker's own SIGTERM/SIGINT handlers.
+            for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(sig, signal.SIG_DFL)
+            status = 1
+            try:
+                status = run_worker(self.app, self.sock)
+            except BaseException:
+                logger.exception("Worker %s crashed", os.getpid())
+            finally:
+                stop_logging()
+                os._exit(status)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %s", pid)
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        self.signal_children(signal.SIGTERM)
+
+    def recycle(self, signum, frame) -> None:
+        self.recycling = list(self.children)
+
+    def signal_children(self, signum, pids=None) -> None:
+        for pid in pids or list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.recycle)
+        for _ in range(self.workers):
+            self.spawn()
+
+        deadline = None
+        while self.children:
+            if self.stopping and deadline is None:
+                deadline = time.monotonic() + settings.server_graceful_timeout + 5
+            if deadline is not None and time.monotonic() > deadline:
+                logger.warning("Workers did not drain in time, killing them")
+                self.signal_children(signal.SIGKILL)
+            if self.draining is None:
+                # Only one worker is draining at a time; the rest keep serving.
+                self.recycling = [p for p in self.recycling if p in self.children]
+                if self.recycling:
+                    self.draining = self.recycling.pop()
+                    self.signal_children(signal.SIGTERM, [self.draining])
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            started = self.children.pop(pid, None)
+            if pid == self.draining:
+                self.draining = None
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.info("Worker %s exited with %s, respawning", pid, code)
+            # A worker signalled before run_worker() set its handlers dies of
+            # SIGTERM; that is a normal stop too.
+            if code not in (0, -signal.SIGTERM) and time.monotonic() - started < 5:
+                time.sleep(1)  # Crash loop backoff.
+            self.spawn()
+        self.sock.close()
+
+
+def main() -> None:
+    # Preload once; workers inherit it copy-on-write.
+    from main import app, configure_logging
+
+    configure_logging()
+
+    sock = bind_socket(settings.server_host, settings.server_port)
+    workers = worker_count()
+    logger.info(
+        "Listening on %s:%s with %s workers",
+        settings.server_host,
+        settings.server_port,
+        workers,
+    )
+    Supervisor(app, sock, workers).run()
+
+
+if __name__ == "__main__":
+    main()
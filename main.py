@@ -1,20 +1,75 @@
-from fastapi import Depends, FastAPI
+import logging
+import secrets
+
+from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 import uvicorn
 from src.contacts.routers import router as router_contacts
 from src.auth.routers import router as router_auth
+from src.admin.routers import authorize_profiling, profile_store
+from src.admin.routers import router as router_admin
+from src.contacts.events import contact_events
+from src.auth.roles import role_registry
+from config.db import (
+    QUERY_CANCELED,
+    SessionLocal,
+    engine,
+    route_name,
+)
 from config.general import settings
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from src.core.admission import AdmissionMiddleware
+from src.core.compression import CompressionMiddleware
+from src.core.log import RequestIdMiddleware, setup_logging
+from src.core.metrics import CONTENT_TYPE, registry
+from src.core.profiling import ProfilingMiddleware
+from src.core.resilience import FailOpenRateLimiter
+from src.core.tracing import (
+    TracingMiddleware,
+    instrument_redis,
+    instrument_sqlalchemy,
+    setup_tracing,
+)
+
+logger = logging.getLogger(__name__)
+
+statement_timeouts = registry.counter(
+    "db_statement_timeouts_total",
+    "Queries stopped by the route's statement_timeout.",
+    ("route",),
+)
+queries_cancelled = registry.counter(
+    "db_queries_cancelled_total",
+    "Queries cancelled because the client disconnected.",
+    ("route",),
+)
 
 app = FastAPI()
 
 app.include_router(router_contacts, prefix="/contacts", tags=["contacts"])
 app.include_router(router_auth, prefix="/auth", tags=["auth"])
+app.include_router(router_admin, prefix="/admin", tags=["admin"])
 
 origins = settings.origins.split(",")
 
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    authorize=authorize_profiling,
+    sample_rate=settings.profile_sample_rate,
+    interval_ms=settings.profile_interval_ms,
+)
+# Inside CORS, so shed requests still get CORS and request id headers.
+app.add_middleware(
+    AdmissionMiddleware,
+    limits=settings.admission_limits,
+    max_wait=settings.admission_max_wait_seconds,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -22,22 +77,107 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+    cpu_budget_ms=settings.compression_cpu_budget_ms,
+)
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(TracingMiddleware)
+
+setup_tracing(settings.trace_sample_rate, settings.trace_exporter)
+if settings.trace_exporter:
+    instrument_sqlalchemy(engine, SessionLocal)
+    instrument_redis()
+
+
+def configure_logging():
+    setup_logging(settings.log_level, settings.log_levels, structured=settings.log_json)
 
 
 @app.on_event("startup")
 async def startup():
-    redis = Redis(host=settings.redis_host, port=settings.redis_port)
-    await FastAPILimiter.init(redis)
+    configure_logging()
+    redis = Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+    )
+    try:
+        await FastAPILimiter.init(redis)
+    except RedisError:
+        # FailOpenRateLimiter lets requests through and loads the script once
+        # Redis is back.
+        logger.warning("Redis unavailable at startup, rate limits are off")
+    try:
+        with SessionLocal() as db:
+            role_registry.refresh(db)
+    except SQLAlchemyError:
+        # RoleChecker and registration load the registry on first use instead.
+        logger.warning("Could not preload roles at startup")
+    await contact_events.start()
+
 
+@app.on_event("shutdown")
+async def shutdown():
+    await contact_events.stop()
+    if FastAPILimiter.redis is not None:  # None if startup failed before init.
+        await FastAPILimiter.close()
 
-@app.get("/", dependencies=[Depends(RateLimiter(times=2, seconds=5))])
+
+@app.get("/", dependencies=[Depends(FailOpenRateLimiter(times=2, seconds=5))])
 async def index():
     return {"msg": "Hello World"}
 
 
+@app.exception_handler(OperationalError)
+async def database_error(request: Request, exc: OperationalError):
+    if getattr(exc.orig, "pgcode", None) != QUERY_CANCELED:
+        raise exc
+    # A query cancelled because the client left has nobody to answer to.
+    if getattr(request.state, "db_cancelled", False):
+        queries_cancelled.inc(route=route_name(request))
+    else:
+        statement_timeouts.inc(route=route_name(request))
+        logger.warning("Statement timeout in %s", route_name(request))
+    return JSONResponse(
+        {"detail": "The request took too long to process"},
+        status_code=504,
+    )
+
+
+metrics_auth = HTTPBearer(auto_error=False)
+
+
+def require_api_key(
+    credentials: HTTPAuthorizationCredentials | None = Depends(metrics_auth),
+):
+    # Scrapers can't log in, so they present API_KEY as a bearer token.
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.api_key.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_api_key)])
+def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
 def root():
     return {"message": "Welcome to FastApi"}
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # Single-process development server; production runs launcher.py.
+    configure_logging()
+    uvicorn.run(
+        app, host=settings.server_host, port=settings.server_port, log_config=None
+    )
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from config.db import Base
+
+
+class StatsRefreshLog(Base):
+    __tablename__ = "stats_refresh_log"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    view_name: Mapped[str] = mapped_column(String)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    duration_ms: Mapped[float] = mapped_column(Float)
+
+
+Index(
+    "ix_stats_refresh_log_view_name_refreshed_at",
+    StatsRefreshLog.view_name,
+    StatsRefreshLog.refreshed_at,
+)
@@ -0,0 +1,65 @@
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from config.db import SessionLocal, get_db
+from config.general import settings
+from src.admin.stats import RefreshInProgress, get_stats, refresh
+from src.auth.schemas import RoleEnum
+from src.auth.utils import RoleChecker
+from src.core.profiling import ProfileStore
+
+logger = logging.getLogger(__name__)
+
+admin_only = RoleChecker([RoleEnum.ADMIN])
+
+router = APIRouter(dependencies=[Depends(admin_only)])
+
+profile_store = ProfileStore(settings.profile_dir, settings.profile_keep)
+
+
+def authorize_profiling(token: str) -> bool:
+    # Runs before routing, so there is no request-scoped session to reuse.
+    with SessionLocal() as db:
+        try:
+            admin_only(token, db)
+        except HTTPException:
+            return False
+    return True
+
+
+@router.get("/profiles")
+def list_profiles():
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str):
+    collapsed = profile_store.collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return collapsed
+
+
+@router.get("/stats")
+def stats(db: Session = Depends(get_db)):
+    return get_stats(db)
+
+
+def run_refresh() -> None:
+    try:
+        refresh()
+    except RefreshInProgress:
+        logger.info("Stats refresh skipped, another one is running")
+
+
+@router.post("/stats/refresh", status_code=status.HTTP_202_ACCEPTED)
+def refresh_stats(background_tasks: BackgroundTasks):
+    # Rebuilding the views can take minutes; each finished view shows up in
+    # the ``refreshes`` section of GET /admin/stats.
+    background_tasks.add_task(run_refresh)
+    return {"detail": "Stats refresh started"}
@@ -0,0 +1,150 @@
+"""Dataset statistics for admins, read from materialized views.
+
+    python -m src.admin.stats refresh
+
+The views (created by migration 05acf7852ce0) hold a handful of rows each
+whatever the size of ``contacts``, so reading them is constant time. They
+are as fresh as their last refresh: schedule ``refresh`` (e.g. every few
+minutes) or call ``POST /admin/stats/refresh``, which runs it in the
+background and answers 202. Refreshes use ``REFRESH
+MATERIALIZED VIEW CONCURRENTLY``, which rebuilds the view next to the old
+one and applies the difference, so readers are never blocked. Each refresh
+is recorded in ``stats_refresh_log``, which ``get_stats`` uses to report
+staleness and refresh cost.
+"""
+
+import argparse
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import column, delete, func, insert, select, table, text
+
+from config.db import engine
+from config.general import settings
+from src.admin.models import StatsRefreshLog
+from src.core.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+contacts_per_user = table(
+    "stats_contacts_per_user",
+    column("bucket"),
+    column("users"),
+    column("contacts"),
+    column("max_contacts"),
+)
+birthdays_per_month = table(
+    "stats_birthdays_per_month", column("month"), column("contacts")
+)
+users_by_status = table("stats_users_by_status", column("is_active"), column("users"))
+
+VIEWS = (contacts_per_user, birthdays_per_month, users_by_status)
+
+# Two refreshes of the same view would only queue behind each other.
+REFRESH_LOCK = 0x5747A75
+LOG_RETENTION = timedelta(days=7)
+
+
+class RefreshInProgress(Exception):
+    pass
+
+
+def refresh() -> dict[str, float]:
+    """Refreshes every view in its own transaction; returns ms per view."""
+    # A single connection rather than a Session: the advisory lock belongs to
+    # the connection and must be released on the one that took it.
+    with engine.connect() as connection:
+        lock = select(func.pg_try_advisory_lock(REFRESH_LOCK))
+        if not connection.execute(lock).scalar():
+            raise RefreshInProgress("A stats refresh is already running")
+        connection.commit()
+        durations = {}
+        try:
+            for view in VIEWS:
+                started = time.perf_counter()
+                connection.execute(
+                    text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}")
+                )
+                duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                connection.execute(
+                    insert(StatsRefreshLog).values(
+                        view_name=view.name, duration_ms=duration_ms
+                    )
+                )
+                connection.commit()
+                durations[view.name] = duration_ms
+                logger.info("Refreshed %s in %.1f ms", view.name, duration_ms)
+            connection.execute(
+                delete(StatsRefreshLog).where(
+                    StatsRefreshLog.refreshed_at < func.now() - LOG_RETENTION
+                )
+            )
+            connection.commit()
+        finally:
+            connection.rollback()
+            connection.execute(select(func.pg_advisory_unlock(REFRESH_LOCK)))
+            connection.commit()
+    return durations
+
+
+def last_refreshes(session) -> dict[str, dict]:
+    rows = session.execute(
+        select(
+            StatsRefreshLog.view_name,
+            StatsRefreshLog.refreshed_at,
+            StatsRefreshLog.duration_ms,
+            func.extract("epoch", func.now() - StatsRefreshLog.refreshed_at).label(
+                "staleness_seconds"
+            ),
+        )
+        .distinct(StatsRefreshLog.view_name)
+        .order_by(StatsRefreshLog.view_name, StatsRefreshLog.refreshed_at.desc())
+    ).all()
+    return {
+        row.view_name: {
+            "refreshed_at": row.refreshed_at,
+            "staleness_seconds": round(float(row.staleness_seconds), 3),
+            "refresh_ms": row.duration_ms,
+        }
+        for row in rows
+    }
+
+
+def get_stats(session) -> dict:
+    refreshes = last_refreshes(session)
+
+    def rows(view, order_by):
+        result = session.execute(select(view).order_by(order_by))
+        return [row._asdict() for row in result]
+
+    buckets = rows(contacts_per_user, contacts_per_user.c.bucket)
+    users = {
+        row["is_active"]: row["users"] for row in rows(users_by_status, "is_active")
+    }
+    return {
+        "contacts_per_user": {
+            "users": sum(bucket["users"] for bucket in buckets),
+            "contacts": sum(bucket["contacts"] for bucket in buckets),
+            "buckets": buckets,
+        },
+        "birthdays_per_month": rows(birthdays_per_month, birthdays_per_month.c.month),
+        "users": {"active": users.get(True, 0), "inactive": users.get(False, 0)},
+        "refreshes": {view.name: refreshes.get(view.name) for view in VIEWS},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh")
+    parser.parse_args()
+
+    setup_logging(settings.log_level, settings.log_levels, structured=settings.log_json)
+    durations = refresh()
+    for name, duration_ms in durations.items():
+        print(f"{name}: {duration_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,63 @@
-from fastapi_mail import ConnectionConfig, MessageSchema, FastMail, MessageType
+import logging
+from functools import lru_cache
 from config.general import settings
 from pydantic import BaseModel, EmailStr
+from src.core.resilience import CircuitOpen, smtp_breaker
+from src.core.tracing import span
 
-# logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 
 class EmailSchema(BaseModel):
     email: EmailStr
 
 
-mail_conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
+# fastapi_mail and jinja2 are slow to import and only needed when a mail is
+# actually rendered or sent, so both are loaded on first use.
+@lru_cache
+def get_mail_conf():
+    from fastapi_mail import ConnectionConfig
 
+    return ConnectionConfig(
+        MAIL_USERNAME=settings.mail_username,
+        MAIL_PASSWORD=settings.mail_password,
+        MAIL_FROM=settings.mail_from,
+        MAIL_PORT=settings.mail_port,
+        MAIL_SERVER=settings.mail_server,
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=True,
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+        TIMEOUT=int(settings.smtp_timeout),
+    )
+
+
+@lru_cache
+def get_template_env():
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    # Templates interpolate user-supplied names into HTML.
+    return Environment(
+        loader=FileSystemLoader("src/templates"), autoescape=select_autoescape()
+    )
+
+
+async def send_email(email: str, subject: str, body: str):
+    from fastapi_mail import FastMail, MessageSchema
 
-async def send_verification(email: str, email_body: str):
     message = MessageSchema(
-        subject="Email Verification",
+        subject=subject,
         recipients=[email],
-        body=email_body,
+        body=body,
         subtype="html",
     )
-    fm = FastMail(mail_conf)
-    await fm.send_message(message)
+    fm = FastMail(get_mail_conf())
+    with span("smtp.send"):
+        await smtp_breaker.call_async(fm.send_message, message)
+
+
+async def send_verification(email: str, email_body: str):
+    try:
+        await send_email(email, "Email Verification", email_body)
+    except CircuitOpen:
+        logger.error("SMTP circuit is open, verification email not sent")
@@ -19,5 +19,7 @@ class User(Base):
     is_active: Mapped[bool] = mapped_column(default=True)
     contacts: Mapped[list["Contact"]] = relationship("Contact", back_populates="owner")
     role_id: Mapped[int] = mapped_column(Integer, ForeignKey("roles.id"), nullable=True)
-    role: Mapped["Role"] = relationship("Role", lazy="selectin")
+    # Authorization goes through role_id and the in-memory role registry, so
+    # the role row is only loaded when a response actually serializes it.
+    role: Mapped["Role"] = relationship("Role", lazy="select")
     avatar: Mapped[str] = mapped_column(String, nullable=True)
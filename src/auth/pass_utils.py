@@ -1,12 +1,21 @@
-from passlib.context import CryptContext
+from functools import lru_cache
 
+from src.core.tracing import span
 
-pwd_contex = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache
+def get_password_context():
+    # passlib and bcrypt are only imported once a password is actually hashed.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_contex.hash(password)
+    with span("bcrypt.hash"):
+        return get_password_context().hash(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_contex.verify(password, hashed_password)
+    with span("bcrypt.verify"):
+        return get_password_context().verify(password, hashed_password)
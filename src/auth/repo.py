@@ -1,10 +1,15 @@
-from functools import lru_cache
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.auth.models import Role, User
 from src.auth.schemas import RoleEnum, UserCreate
 from src.auth.pass_utils import get_password_hash
+from src.auth.roles import role_registry
+
+# Runs on every authenticated request. Built once, so SQLAlchemy memoizes its
+# cache key and each call only binds the email.
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
 
 
 class UserRepository:
@@ -13,17 +18,19 @@ class UserRepository:
 
     def create_user(self, user_create: UserCreate):
         hashed_password = get_password_hash(user_create.password)
-        user_role = RoleRepository(self.session).get_role_by_name(RoleEnum.USER)
+        role_registry.ensure_loaded(self.session)
         new_user = User(
             username=user_create.username,
             hashed_password=hashed_password,
             email=user_create.email,
-            role_id=user_role.id,
+            role_id=role_registry.id_of(RoleEnum.USER),
             is_active=False,
         )
         self.session.add(new_user)
         self.session.commit()
         self.session.refresh(new_user)  # To get the ID from the database
+        # Serve the role from the registry instead of lazy-loading it.
+        set_committed_value(new_user, "role", role_registry.role(RoleEnum.USER))
         return new_user
 
     def get_user(self, username: str) -> User:
@@ -32,8 +39,7 @@ class UserRepository:
         return result.scalar_one_or_none()
 
     def get_user_by_email(self, email: str) -> User:
-        query = select(User).where(User.email == email)
-        result = self.session.execute(query)
+        result = self.session.execute(USER_BY_EMAIL, {"email": email})
         return result.scalar_one_or_none()
 
     def activate_user(self, user: User):
@@ -62,7 +68,6 @@ class RoleRepository:
     def __init__(self, session):
         self.session = session
 
-    @lru_cache
     def get_role_by_name(self, name: RoleEnum):
         query = select(Role).where(Role.name == name.value)
         result = self.session.execute(query)
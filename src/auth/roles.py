@@ -0,0 +1,54 @@
+import threading
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.auth.models import Role
+from src.auth.schemas import RoleEnum
+
+
+class RoleRegistry:
+    """Process-wide, read-only mapping between role names and ids.
+
+    Roles only change through migrations, so they are loaded once (at startup
+    or on first use) and then served from memory. ``refresh`` reloads them
+    and swaps the mapping in one assignment, so readers never see a partial
+    update.
+    """
+
+    def __init__(self):
+        self._roles: tuple[MappingProxyType, MappingProxyType] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._roles is not None
+
+    def refresh(self, session) -> None:
+        roles = session.execute(select(Role)).scalars().all()
+        by_name = MappingProxyType({role.name: role.id for role in roles})
+        by_id = MappingProxyType({role.id: role.name for role in roles})
+        self._roles = (by_name, by_id)
+
+    def ensure_loaded(self, session) -> None:
+        if self._roles is None:
+            with self._lock:
+                if self._roles is None:
+                    self.refresh(session)
+
+    def id_of(self, role: RoleEnum) -> int:
+        return self._roles[0][role.value]
+
+    def name_of(self, role_id: int | None) -> str | None:
+        return self._roles[1].get(role_id)
+
+    def role(self, role: RoleEnum) -> Role:
+        # A detached instance with a real identity: it can be attached to a
+        # user for serialization without a SELECT and is never INSERTed.
+        instance = Role(id=self.id_of(role), name=role.value)
+        make_transient_to_detached(instance)
+        return instance
+
+
+role_registry = RoleRegistry()
@@ -1,5 +1,3 @@
-import cloudinary
-import cloudinary.uploader
 import logging
 
 from fastapi import (
@@ -11,11 +9,12 @@ from fastapi import (
     status,
     BackgroundTasks,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from src.auth.models import User
-from src.auth.email_utils import send_verification
+from src.auth.email_utils import get_template_env, send_verification
 from src.auth.pass_utils import verify_password
 from src.auth.utils import (
     create_access_token,
@@ -23,17 +22,17 @@ from src.auth.utils import (
     create_verification_token,
     decode_verification_token,
     get_current_user,
+    upload_image_to_cloudinary,
 )
 from src.auth.repo import UserRepository
 from src.auth.schemas import Token, UserBase, UserCreate, UserResponse
 from config.db import get_db
-from jinja2 import Environment, FileSystemLoader
 from config.general import settings
+from src.core.resilience import CircuitOpen
+from src.core.tracing import span
 
 router = APIRouter()
-env = Environment(loader=FileSystemLoader("src/templates"))
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +43,8 @@ async def update_avatar_user(
     db: Session = Depends(get_db),
 ):
     try:
+        import cloudinary
+
         cloudinary.config(
             cloud_name=settings.cloudinary_name,
             api_key=settings.cloudinary_api_key,
@@ -51,20 +52,25 @@ async def update_avatar_user(
             secure=True,
         )
         user_repo = UserRepository(db)
-        result = cloudinary.uploader.upload(file.file)
-
-        url = result.get("secure_url")
+        # The upload blocks; run it off the event loop.
+        url = await run_in_threadpool(upload_image_to_cloudinary, file.file)
         if not url:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to upload image to Cloudinary",
             )
 
-        logger.debug(f"Updating user avatar URL to {url}")
+        logger.debug("Updating user avatar URL to %s", url)
 
         user = user_repo.update_avatar(current_user.email, url)
         return user
 
+    except CircuitOpen as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image storage is unavailable, try again later",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
     except Exception as e:
         logger.exception("Failed to update avatar")
         raise HTTPException(
@@ -93,8 +99,9 @@ def register(
         f"http://localhost:8000/auth/verify-email?token={verification_token}"
     )
 
-    template = env.get_template("verification_email.html")
-    email_body = template.render(verification_link=verification_link)
+    with span("template.render", template="verification_email.html"):
+        template = get_template_env().get_template("verification_email.html")
+        email_body = template.render(verification_link=verification_link)
 
     background_tasks.add_task(send_verification, user.email, email_body)
     return user
@@ -125,7 +132,7 @@ def login_for_token(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     refresh_token = create_refresh_token(data={"sub": user.email})
     return {
         "access_token": access_token,
@@ -39,5 +39,11 @@ class Token(BaseModel):
     token_type: str
 
 
+class StreamToken(BaseModel):
+    stream_token: str
+    expires_in: int
+
+
 class TokenData(BaseModel):
     username: str | None = None
+    user_id: int | None = None
@@ -1,26 +1,26 @@
-import os
-import cloudinary.uploader
-
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
 from src.auth.repo import UserRepository
+from src.auth.roles import role_registry
 from src.auth.schemas import UserResponse
 from src.auth.models import User
 from config.db import get_db
+from config.general import settings
+from src.core.resilience import cloudinary_breaker
+from src.core.tracing import span
 from src.auth.schemas import RoleEnum, TokenData
-from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-load_dotenv()
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 VERIFICATION_TOKEN_HOUSE = 24
+STREAM_TOKEN_EXPIRE_SECONDS = 60
+STREAM_TOKEN_SCOPE = "events"
 
 
 def create_verification_token(email: str):
@@ -65,26 +65,36 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> TokenData | None:
+def create_stream_token(email: str, user_id: int) -> str:
+    # Browsers can only pass it in the URL, where it ends up in access logs,
+    # so it is short-lived and good for nothing but opening event streams.
+    expire = datetime.now(timezone.utc) + timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS)
+    to_encode = {
+        "exp": expire,
+        "sub": email,
+        "uid": user_id,
+        "scope": STREAM_TOKEN_SCOPE,
+    }
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_access_token(token: str, scope: str | None = None) -> TokenData | None:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("scope") != scope:
             return None
-        return TokenData(username=username)
+        return TokenData(username=username, user_id=payload.get("uid"))
     except JWTError:
         return None
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> UserResponse:
+def user_from_token(token_data: TokenData | None, db: Session) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = decode_access_token(token)
     if token_data is None:
         raise credentials_exception
     user_repo = UserRepository(db)
@@ -94,20 +104,32 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> UserResponse:
+    return user_from_token(decode_access_token(token), db)
+
+
 def upload_image_to_cloudinary(file):
-    response = cloudinary.uploader.upload(file)
-    return response["secure_url"]
+    import cloudinary.uploader
+
+    with span("cloudinary.upload"):
+        response = cloudinary_breaker.call(
+            cloudinary.uploader.upload, file, timeout=settings.cloudinary_timeout
+        )
+    return response.get("secure_url")
 
 
 class RoleChecker:
     def __init__(self, allowed_roles: list[RoleEnum]):
-        self.allowed_roles = allowed_roles
+        self.allowed_roles = frozenset(role.value for role in allowed_roles)
 
     def __call__(
         self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
     ) -> User:
         user = get_current_user(token, db)
-        if user and user.role.name not in [role.value for role in self.allowed_roles]:
+        role_registry.ensure_loaded(db)
+        if user and role_registry.name_of(user.role_id) not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not authorized to access this resource",
@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import threading
+import uuid
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from redis.exceptions import RedisError
+
+from config.redis import get_redis
+from src.auth.utils import decode_access_token, oauth2_scheme
+from src.core.resilience import CircuitOpen, redis_breaker
+from src.core.negotiation import wants_msgpack
+
+logger = logging.getLogger(__name__)
+
+
+class ContactVersionStore:
+    """Per-owner version of the contact collection, bumped on every write.
+
+    Versions live in Redis so all workers agree on them, and ``get`` returns
+    None, meaning "don't issue or validate tags", whenever they can't be
+    trusted:
+
+    * Redis is unreachable, or ``redis_breaker`` is open and it isn't even
+      asked;
+    * a bump for the owner failed and hasn't been replayed yet. Failed bumps
+      are kept and replayed on the next successful Redis call, so tags issued
+      before an outage never validate against writes made during it.
+
+    Every version also carries a generation that is regenerated if Redis
+    loses its data, so counters restarting from zero can't match old tags.
+    """
+
+    key_prefix = "contacts:version:"
+    generation_key = "contacts:version-generation"
+
+    def __init__(self, redis_factory=get_redis):
+        self.redis_factory = redis_factory
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets per-process state; forked workers start from a clean one."""
+        self._pending: set[int] = set()
+        self._lock = threading.Lock()
+
+    def _replay(self, redis) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for owner_id in pending:
+                pipe.incr(f"{self.key_prefix}{owner_id}")
+            pipe.execute()
+        except RedisError:
+            with self._lock:
+                self._pending |= pending
+            raise
+
+    def _read(self, owner_id: int):
+        redis = self.redis_factory()
+        self._replay(redis)
+        # One round trip: create the generation if missing, then read.
+        pipe = redis.pipeline(transaction=True)
+        pipe.set(self.generation_key, uuid.uuid4().hex[:8], nx=True)
+        pipe.mget(self.generation_key, f"{self.key_prefix}{owner_id}")
+        _, (generation, version) = pipe.execute()
+        return generation, version
+
+    def _incr(self, owner_id: int) -> None:
+        redis = self.redis_factory()
+        self._replay(redis)
+        redis.incr(f"{self.key_prefix}{owner_id}")
+
+    def get(self, owner_id: int) -> str | None:
+        try:
+            generation, version = redis_breaker.call(self._read, owner_id)
+        except CircuitOpen:
+            return None
+        except RedisError:
+            logger.warning("Contact version store unavailable, not using ETags")
+            return None
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return f"{generation}.{int(version or 0)}"
+
+    def bump(self, owner_id: int) -> None:
+        try:
+            redis_breaker.call(self._incr, owner_id)
+        except (CircuitOpen, RedisError):
+            with self._lock:
+                self._pending.add(owner_id)
+            logger.warning("Failed to bump contact version for owner %s", owner_id)
+
+
+contact_versions = ContactVersionStore()
+
+
+def make_etag(owner_id: int, version: str, request: Request, *parts) -> str:
+    # The tag is strong: it covers the owner's collection version plus
+    # everything that shapes the payload (path, query string, extra parts).
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (request.url.path, request.url.query, *parts):
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'"{owner_id}-{version}-{digest.hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class ConditionalGet:
+    """Answers ``If-None-Match`` for owner-scoped contact reads.
+
+    Must be listed after the authentication, role and rate limit
+    dependencies: a 304 is an answer too, and only goes to a user who is
+    still allowed to read the fresh response. A matching tag then skips the
+    query itself. ``daily`` mixes the current date into the tag for payloads
+    that depend on "today", like upcoming birthdays.
+    """
+
+    def __init__(self, daily: bool = False):
+        self.daily = daily
+
+    def __call__(
+        self,
+        request: Request,
+        response: Response,
+        token: str = Depends(oauth2_scheme),
+    ) -> None:
+        token_data = decode_access_token(token)
+        if token_data is None or token_data.user_id is None:
+            return
+        owner_id = token_data.user_id
+        version = contact_versions.get(owner_id)
+        if version is None:
+            return
+        parts = (wants_msgpack(request),)
+        if self.daily:
+            parts += (date.today().isoformat(),)
+        etag = make_etag(owner_id, version, request, *parts)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            # The tag depends on the negotiated format, so caches must key
+            # the 304 on Accept like the full response.
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={**headers, "Vary": "Accept"},
+            )
+        response.headers.update(headers)
@@ -0,0 +1,251 @@
+"""Duplicate contact detection.
+
+    python -m src.contacts.dedupe run [--owner 42] [--batch-size 500]
+
+Contacts are normalized once (``src.contacts.normalize``) and grouped by
+blocking keys: normalized email, trailing phone digits, the sorted tokens of
+the full name, and a last name prefix plus first initial. Only contacts
+sharing a block are compared, so an owner with n contacts costs about n times
+the block size instead of n². Blocks larger than ``settings.dedupe_max_block``
+(a shared office number, "john smith") are skipped rather than compared
+pairwise.
+
+Each pair is scored on email, phone, name similarity and birthday; pairs at
+or above ``settings.dedupe_threshold`` replace the owner's rows in
+``contact_duplicates`` in one transaction. Merging is done by the user through
+``POST /contacts/{contact_id}/merge``.
+"""
+
+import argparse
+import logging
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import NamedTuple
+
+from sqlalchemy import delete, insert, select
+
+from config.db import SessionLocal
+from src.auth.models import User
+from config.general import settings
+from src.contacts.models import Contact, ContactDuplicate
+from src.contacts.normalize import normalize_email, normalize_name, normalize_phone
+from src.contacts.repo import is_live
+from src.core.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS = {"email": 0.6, "phone": 0.5, "name": 0.4, "birthday": 0.2}
+# Below this similarity the name doesn't count towards the score at all.
+NAME_SIMILARITY_FLOOR = 0.75
+
+
+class Normalized(NamedTuple):
+    id: int
+    email: str
+    phone: str
+    name: str
+    birthday: object
+    first: str
+    last: str
+
+
+def normalize(row) -> Normalized:
+    first, last = normalize_name(row.first_name), normalize_name(row.last_name)
+    return Normalized(
+        row.id,
+        normalize_email(row.email),
+        normalize_phone(row.phone_number),
+        # Sorted tokens: "Smith John" and "John Smith" compare equal.
+        " ".join(sorted(f"{first} {last}".split())),
+        row.birthday,
+        first,
+        last,
+    )
+
+
+def blocking_keys(contact: Normalized) -> list[tuple[str, str]]:
+    keys = []
+    if contact.email:
+        keys.append(("email", contact.email))
+    if contact.phone:
+        keys.append(("phone", contact.phone))
+    if contact.name:
+        keys.append(("name", contact.name))
+        if contact.first and contact.last:
+            last = contact.last.replace(" ", "")
+            keys.append(("prefix", f"{last[:4]}|{contact.first[0]}"))
+    return keys
+
+
+def score_block(block: list[Normalized], threshold: float):
+    """Yields ``(low_id, high_id, score, reasons)`` for the likely duplicates."""
+    matcher = SequenceMatcher(autojunk=False)
+    for index, a in enumerate(block):
+        # SequenceMatcher caches its analysis of seq2, so each contact is
+        # indexed once and compared against the rest of the block.
+        matcher.set_seq2(a.name)
+        for b in block[index + 1 :]:
+            score, reasons = 0.0, []
+            if a.email and a.email == b.email:
+                score += WEIGHTS["email"]
+                reasons.append("email")
+            if a.phone and a.phone == b.phone:
+                score += WEIGHTS["phone"]
+                reasons.append("phone")
+            if a.birthday == b.birthday:
+                score += WEIGHTS["birthday"]
+                reasons.append("birthday")
+            # Skip the expensive comparison when it can't change the outcome.
+            if score + WEIGHTS["name"] >= threshold:
+                if a.name == b.name:
+                    similarity = 1.0
+                else:
+                    matcher.set_seq1(b.name)
+                    similarity = (
+                        matcher.ratio()
+                        if matcher.real_quick_ratio() >= NAME_SIMILARITY_FLOOR
+                        and matcher.quick_ratio() >= NAME_SIMILARITY_FLOOR
+                        else 0.0
+                    )
+                if similarity >= NAME_SIMILARITY_FLOOR:
+                    score += WEIGHTS["name"] * similarity
+                    reasons.append("name")
+            if score >= threshold:
+                low, high = sorted((a.id, b.id))
+                yield low, high, round(min(score, 1.0), 3), ",".join(reasons)
+
+
+def find_duplicates(
+    rows, threshold: float | None = None, max_block: int | None = None
+) -> dict[tuple[int, int], tuple[float, str]]:
+    threshold = settings.dedupe_threshold if threshold is None else threshold
+    max_block = settings.dedupe_max_block if max_block is None else max_block
+    blocks = defaultdict(list)
+    for row in rows:
+        contact = normalize(row)
+        for key in blocking_keys(contact):
+            blocks[key].append(contact)
+
+    pairs = {}
+    for key, block in blocks.items():
+        if len(block) < 2:
+            continue
+        if len(block) > max_block:
+            logger.debug("Skipping %s block of %s contacts", key[0], len(block))
+            continue
+        for low, high, score, reasons in score_block(block, threshold):
+            # The same pair can meet in several blocks; scores are identical.
+            pairs[low, high] = (score, reasons)
+    return pairs
+
+
+def owner_batches(session, batch_size: int):
+    """Ids of every user, active or not, in keyset-paginated batches."""
+    after_id = 0
+    while True:
+        owner_ids = (
+            session.execute(
+                select(User.id)
+                .where(User.id > after_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not owner_ids:
+            return
+        yield owner_ids
+        after_id = owner_ids[-1]
+
+
+def owner_contacts(session, owner_id: int):
+    return session.execute(
+        select(
+            Contact.id,
+            Contact.first_name,
+            Contact.last_name,
+            Contact.email,
+            Contact.phone_number,
+            Contact.birthday,
+        ).where(Contact.owner_id == owner_id, is_live)
+    ).all()
+
+
+def dedupe_owner(session, owner_id: int) -> tuple[int, int]:
+    rows = owner_contacts(session, owner_id)
+    pairs = find_duplicates(rows)
+    session.execute(
+        delete(ContactDuplicate).where(ContactDuplicate.owner_id == owner_id)
+    )
+    if pairs:
+        session.execute(
+            insert(ContactDuplicate),
+            [
+                {
+                    "owner_id": owner_id,
+                    "contact_id": low,
+                    "duplicate_id": high,
+                    "score": score,
+                    "reasons": reasons,
+                }
+                for (low, high), (score, reasons) in pairs.items()
+            ],
+        )
+    session.commit()
+    return len(rows), len(pairs)
+
+
+def run(owner_id: int | None = None, batch_size: int = 500) -> dict:
+    contacts = pairs = owners = 0
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        if owner_id is not None:
+            owner_ids = [[owner_id]]
+        else:
+            owner_ids = owner_batches(session, batch_size)
+        for batch in owner_ids:
+            for owner in batch:
+                owner_contacts_count, owner_pairs = dedupe_owner(session, owner)
+                contacts += owner_contacts_count
+                pairs += owner_pairs
+                owners += 1
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Dedupe: %s owners, %s contacts (%.0f contacts/s), %s candidates",
+                owners,
+                contacts,
+                contacts / elapsed,
+                pairs,
+            )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "owners": owners,
+        "contacts": contacts,
+        "pairs": pairs,
+        "seconds": elapsed,
+        "contacts_per_second": contacts / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--owner", type=int, default=None)
+    run_parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_logging(settings.log_level, settings.log_levels, structured=settings.log_json)
+    stats = run(args.owner, args.batch_size)
+    print(
+        f"{stats['owners']} owners, {stats['contacts']} contacts in "
+        f"{stats['seconds']:.1f}s ({stats['contacts_per_second']:.0f} contacts/s), "
+        f"{stats['pairs']} duplicate candidates"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Daily digest of upcoming contact birthdays for every user.
+
+    python -m src.contacts.digest run --days 7 --batch-size 500
+    python -m src.contacts.digest send
+
+``run`` walks active users in id order, one batch at a time, and loads the
+upcoming birthdays of the whole batch with a single query. Rendered digests
+are pushed to the ``mail:outbox`` Redis list in the same MULTI as the id of
+the batch's last user, so an interrupted run resumes after the last finished
+batch without queueing anything twice. The cursor is per day, which makes it
+safe to schedule ``run`` more often than daily. ``send`` drains the outbox
+over SMTP; each digest is moved to ``mail:outbox:processing`` while it is
+being sent and only removed once SMTP accepted it, so a crashed sender leaves
+it there for the next ``send`` to re-queue. Run one ``send`` at a time.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select
+
+from config.db import SessionLocal
+from config.general import settings
+from config.redis import get_redis
+from src.auth.email_utils import get_template_env, send_email
+from src.auth.models import User
+from src.contacts.models import Contact
+from src.contacts.repo import in_birthday_window, is_live
+from src.core.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+OUTBOX = "mail:outbox"
+PROCESSING = "mail:outbox:processing"
+CURSOR_KEY = "digest:birthdays:{day}:cursor"
+CURSOR_TTL = 2 * 24 * 3600
+
+
+def user_batches(session, after_id: int, batch_size: int):
+    while True:
+        users = session.execute(
+            select(User.id, User.username, User.email)
+            .where(User.id > after_id, User.is_active)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not users:
+            return
+        yield users
+        after_id = users[-1].id
+
+
+def days_until(birthday: date, today: date) -> int:
+    for year in (today.year, today.year + 1):
+        try:
+            next_birthday = birthday.replace(year=year)
+        except ValueError:  # 29 February outside a leap year.
+            next_birthday = date(year, 3, 1)
+        if next_birthday >= today:
+            return (next_birthday - today).days
+    return 0
+
+
+def upcoming_by_owner(session, owner_ids: list[int], days: int, today: date):
+    rows = session.execute(
+        select(
+            Contact.owner_id,
+            Contact.first_name,
+            Contact.last_name,
+            Contact.birthday,
+        ).where(
+            Contact.owner_id.in_(owner_ids),
+            is_live,
+            in_birthday_window(days, today),
+        )
+    ).all()
+    upcoming = defaultdict(list)
+    for row in rows:
+        contact = row._asdict()
+        contact["days_left"] = days_until(row.birthday, today)
+        upcoming[row.owner_id].append(contact)
+    for contacts in upcoming.values():
+        contacts.sort(key=lambda contact: contact["days_left"])
+    return upcoming
+
+
+def run(days: int = 7, batch_size: int = 500, today: date | None = None) -> dict:
+    today = today or date.today()
+    redis = get_redis()
+    cursor_key = CURSOR_KEY.format(day=today.isoformat())
+    after_id = int(redis.get(cursor_key) or 0)
+    if after_id:
+        logger.info("Resuming birthday digest after user %s", after_id)
+    template = get_template_env().get_template("birthday_digest.html")
+
+    users = queued = 0
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        for batch in user_batches(session, after_id, batch_size):
+            upcoming = upcoming_by_owner(
+                session, [user.id for user in batch], days, today
+            )
+            # End the read transaction between batches so a long run doesn't
+            # hold back vacuum.
+            session.rollback()
+            pipe = redis.pipeline(transaction=True)
+            for user in batch:
+                contacts = upcoming.get(user.id)
+                if not contacts:
+                    continue
+                body = template.render(
+                    username=user.username, contacts=contacts, days=days
+                )
+                pipe.rpush(
+                    OUTBOX,
+                    json.dumps(
+                        {
+                            "email": user.email,
+                            "subject": "Upcoming birthdays",
+                            "body": body,
+                        }
+                    ),
+                )
+                queued += 1
+            pipe.set(cursor_key, batch[-1].id, ex=CURSOR_TTL)
+            pipe.execute()
+            users += len(batch)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Birthday digest: %s users (%.0f users/s), %s emails queued",
+                users,
+                users / elapsed,
+                queued,
+            )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "users": users,
+        "queued": queued,
+        "seconds": elapsed,
+        "users_per_second": users / elapsed if elapsed else 0.0,
+    }
+
+
+async def send_outbox(limit: int | None = None) -> int:
+    redis = get_redis()
+    # Digests a previous sender took but never finished go first, in order.
+    while redis.lmove(PROCESSING, OUTBOX, "RIGHT", "LEFT") is not None:
+        pass
+    sent = 0
+    while limit is None or sent < limit:
+        raw = redis.lmove(OUTBOX, PROCESSING, "LEFT", "RIGHT")
+        if raw is None:
+            break
+        try:
+            mail = json.loads(raw)
+            recipient, subject, body = mail["email"], mail["subject"], mail["body"]
+        except (ValueError, KeyError, TypeError):
+            logger.error("Dropping malformed digest %r", raw[:200])
+            redis.lrem(PROCESSING, 1, raw)
+            continue
+        try:
+            await send_email(recipient, subject, body)
+        except Exception:
+            # Put it back at the head and stop; the next run retries it.
+            pipe = redis.pipeline(transaction=True)
+            pipe.lrem(PROCESSING, 1, raw)
+            pipe.lpush(OUTBOX, raw)
+            pipe.execute()
+            logger.exception("Failed to send digest to %s", recipient)
+            break
+        redis.lrem(PROCESSING, 1, raw)
+        sent += 1
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--days", type=int, default=7)
+    run_parser.add_argument("--batch-size", type=int, default=500)
+    run_parser.add_argument("--date", type=date.fromisoformat, default=None)
+    send_parser = commands.add_parser("send")
+    send_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    setup_logging(settings.log_level, settings.log_levels, structured=settings.log_json)
+    if args.command == "run":
+        stats = run(args.days, args.batch_size, args.date)
+        print(
+            f"{stats['users']} users in {stats['seconds']:.1f}s "
+            f"({stats['users_per_second']:.0f} users/s), "
+            f"{stats['queued']} digests queued"
+        )
+    else:
+        print(f"{asyncio.run(send_outbox(args.limit))} emails sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config.db import SessionLocal
+from config.general import settings
+from config.redis import get_redis
+from src.auth.utils import (
+    STREAM_TOKEN_SCOPE,
+    decode_access_token,
+    get_current_user,
+    user_from_token,
+)
+from src.core.resilience import CircuitOpen, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "contacts:events"
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
+
+
+def publish_contact_event(owner_id: int, action: str, contact_id: int) -> None:
+    event = {"owner_id": owner_id, "action": action, "contact_id": contact_id}
+    try:
+        redis_breaker.call(get_redis().publish, CHANNEL, json.dumps(event))
+    except (CircuitOpen, RedisError):
+        logger.warning("Failed to publish %s event for contact %s", action, contact_id)
+
+
+class ContactEventBroker:
+    """Fans contact change events out to the streams open on this worker.
+
+    Each worker holds a single Redis subscription no matter how many clients
+    are connected; subscribers get a bounded queue. A subscriber that falls
+    behind has its backlog replaced by one ``resync`` event instead of
+    growing without limit.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.subscribers: dict[int, set[asyncio.Queue]] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def subscribe(self, owner_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.setdefault(owner_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, owner_id: int, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[owner_id]
+
+    def dispatch(self, event: dict) -> None:
+        for queue in self.subscribers.get(event.get("owner_id"), ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._resync(queue)
+
+    async def _listen(self) -> None:
+        delay = 1
+        while True:
+            redis = Redis(host=settings.redis_host, port=settings.redis_port)
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    delay = 1
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            event = self._decode(message["data"])
+                        except (ValueError, KeyError):
+                            # One bad publisher must not take the stream down.
+                            logger.warning(
+                                "Dropping malformed contact event %r",
+                                message["data"][:200],
+                            )
+                            continue
+                        self.dispatch(event)
+            except RedisError:
+                logger.warning(
+                    "Contact event subscription lost, retrying in %ss", delay
+                )
+            except Exception:
+                logger.exception(
+                    "Contact event listener failed, restarting in %ss", delay
+                )
+            finally:
+                await redis.aclose()
+            # Clients may have missed events while the subscription was down.
+            for queues in self.subscribers.values():
+                for queue in queues:
+                    self._resync(queue)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    @staticmethod
+    def _decode(data: bytes) -> dict:
+        event = json.loads(data)
+        if not isinstance(event, dict):
+            raise ValueError("Contact event is not an object")
+        # Streams route and format every event by its owner and action.
+        missing = {"owner_id", "action"} - event.keys()
+        if missing:
+            raise KeyError(f"Contact event lacks {', '.join(sorted(missing))}")
+        return event
+
+    @staticmethod
+    def _resync(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"action": "resync"})
+
+
+contact_events = ContactEventBroker()
+
+
+def get_stream_user_id(
+    stream_token: str | None = None,
+    bearer_token: str | None = Depends(optional_oauth2_scheme),
+) -> int:
+    # Streams stay open for minutes, so authenticate with a short-lived session
+    # instead of get_db, which would pin a pooled connection for the whole stream.
+    # Browser EventSource clients can't set headers; they pass a token from
+    # POST /contacts/stream-token as ``stream_token``, never an access token,
+    # since query strings end up in access logs.
+    with SessionLocal() as db:
+        if bearer_token:
+            return get_current_user(bearer_token, db).id
+        token_data = decode_access_token(stream_token or "", STREAM_TOKEN_SCOPE)
+        return user_from_token(token_data, db).id
+
+
+async def stream_contact_events(owner_id: int):
+    queue = contact_events.subscribe(owner_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.events_heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing idle connections.
+                yield ": ping\n\n"
+                continue
+            yield f"event: {event['action']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        contact_events.unsubscribe(owner_id, queue)
@@ -1,4 +1,17 @@
-from sqlalchemy import Date, Integer, String, ForeignKey
+from datetime import datetime
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    func,
+    literal_column,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from config.db import Base
@@ -6,18 +19,97 @@ from config.db import Base
 
 class Contact(Base):
     __tablename__ = "contacts"
+    # Hash-partitioned by owner: every owner-scoped query is pruned to a single
+    # partition, so the partition key has to be part of the primary key and of
+    # every unique index.
+    __table_args__ = (
+        PrimaryKeyConstraint("owner_id", "id"),
+        {"postgresql_partition_by": "HASH (owner_id)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, index=True
+    )
     first_name: Mapped[str] = mapped_column(String, index=True)
     last_name: Mapped[str] = mapped_column(String, index=True)
-    email: Mapped[str] = mapped_column(String, unique=True, index=True)
+    email: Mapped[str] = mapped_column(String, index=True)
     phone_number: Mapped[str] = mapped_column(String, index=True)
+    # phone_number in E.164, for lookups; None if it isn't a valid number.
+    phone_e164: Mapped[str | None] = mapped_column(String, nullable=True)
     birthday: Mapped[Date] = mapped_column(Date)
     additional_info: Mapped[str | None] = mapped_column(String, nullable=True)
     owner_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("users.id"), nullable=True
+        Integer, ForeignKey("users.id"), primary_key=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    # Deleted contacts are kept as tombstones so delta sync can report them.
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
     )
 
     owner: Mapped["User"] = relationship(
         "User", back_populates="contacts", lazy="selectin"
     )
+
+
+class ContactDuplicate(Base):
+    """A pair of an owner's contacts that the dedupe job thinks are the same.
+
+    ``contact_id`` is always the lower id of the pair.
+    """
+
+    __tablename__ = "contact_duplicates"
+    __table_args__ = (
+        PrimaryKeyConstraint("owner_id", "contact_id", "duplicate_id"),
+        ForeignKeyConstraint(
+            ["owner_id", "contact_id"],
+            ["contacts.owner_id", "contacts.id"],
+            ondelete="CASCADE",
+        ),
+        ForeignKeyConstraint(
+            ["owner_id", "duplicate_id"],
+            ["contacts.owner_id", "contacts.id"],
+            ondelete="CASCADE",
+        ),
+    )
+
+    owner_id: Mapped[int] = mapped_column(Integer)
+    contact_id: Mapped[int] = mapped_column(Integer)
+    duplicate_id: Mapped[int] = mapped_column(Integer)
+    score: Mapped[float] = mapped_column(Float)
+    reasons: Mapped[str] = mapped_column(String)  # e.g. "email,name"
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+# Same expression as the one matched by ContactsRepository.find_contact, so
+# Postgres can use the functional index for "first last" lookups.
+contact_full_name = Contact.first_name + literal_column("' '") + Contact.last_name
+
+Index(
+    "ix_contacts_owner_id_email",
+    Contact.owner_id,
+    Contact.email,
+    unique=True,
+    postgresql_where=Contact.deleted_at.is_(None),
+)
+Index(
+    "ix_contacts_owner_id_updated_at_id",
+    Contact.owner_id,
+    Contact.updated_at,
+    Contact.id,
+)
+Index(
+    "ix_contacts_owner_id_phone_e164",
+    Contact.owner_id,
+    Contact.phone_e164,
+    postgresql_where=Contact.deleted_at.is_(None),
+)
+Index("ix_contacts_owner_id_first_name", Contact.owner_id, Contact.first_name)
+Index("ix_contacts_owner_id_full_name", Contact.owner_id, contact_full_name)
@@ -0,0 +1,56 @@
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_NON_DIGIT = re.compile(r"\D")
+
+# Phones are compared on their trailing digits, so "+380 67 123 4567",
+# "067-123-45-67" and "(67) 1234567" meet despite different prefixes.
+PHONE_MATCH_DIGITS = 9
+
+
+def normalize_name(name: str | None) -> str:
+    """Lowercase, accents and punctuation stripped, single spaces."""
+    if not name:
+        return ""
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", name.casefold()).split())
+
+
+def normalize_email(email: str | None) -> str:
+    if not email:
+        return ""
+    local, _, domain = email.strip().casefold().partition("@")
+    # "john+work@example.com" reaches the same mailbox as "john@example.com".
+    return f"{local.split('+', 1)[0]}@{domain}"
+
+
+def to_e164(phone: str | None, country_code: str) -> str | None:
+    """Canonical ``+<country code><number>`` form, or None if it can't be one.
+
+    Numbers without an international prefix are taken as national numbers of
+    ``country_code``, with their trunk ``0`` dropped: with ``380``,
+    ``067 123 45 67`` becomes ``+380671234567``.
+    """
+    if not phone:
+        return None
+    stripped = phone.strip()
+    digits = _NON_DIGIT.sub("", stripped)
+    if stripped.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith(country_code) and len(digits) > 10:
+        pass  # "380671234567" dialed without the plus.
+    else:
+        digits = country_code + digits.removeprefix("0")
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return f"+{digits}"
+
+
+def normalize_phone(phone: str | None) -> str:
+    digits = _NON_DIGIT.sub("", phone or "")
+    return digits[-PHONE_MATCH_DIGITS:] if len(digits) >= 7 else ""
@@ -1,109 +1,206 @@
-from datetime import datetime, timedelta
-from sqlalchemy import extract, or_, select, update
+import base64
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    and_,
+    bindparam,
+    delete,
+    extract,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.orm import aliased
 
-from src.contacts.models import Contact
+from config.general import settings
+from src.contacts.cache import contact_versions
+from src.contacts.events import publish_contact_event
+from src.contacts.models import Contact, ContactDuplicate, contact_full_name
+from src.contacts.normalize import to_e164
 from src.contacts.schemas import ContactsCreate
+from src.contacts.serializers import CONTACT_ROW_COLUMNS
+
+MAX_CONTACT_ID = 2**31 - 1
+
+# Tombstoned contacts stay in the table for delta sync; every other read
+# has to skip them.
+is_live = Contact.deleted_at.is_(None)
+
+# Statements of the hottest reads are built once: SQLAlchemy memoizes their
+# cache key and compiled SQL, so a call only binds its parameters instead of
+# rebuilding the construct and its cache key every time.
+CONTACTS_BY_OWNER = (
+    select(Contact)
+    .where(Contact.owner_id == bindparam("owner_id"), is_live)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+CONTACT_ROWS_BY_OWNER = (
+    select(*CONTACT_ROW_COLUMNS)
+    .join(Contact.owner)
+    .where(Contact.owner_id == bindparam("owner_id"), is_live)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+CONTACT_BY_ID_AND_OWNER = select(Contact).where(
+    Contact.owner_id == bindparam("owner_id"),
+    Contact.id == bindparam("contact_id"),
+    is_live,
+)
+
+
+def encode_sync_token(updated_at: datetime, contact_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{contact_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_sync_token(token: str) -> tuple[datetime, int]:
+    try:
+        updated_at, contact_id = base64.urlsafe_b64decode(token).decode().split("|")
+        return datetime.fromisoformat(updated_at), int(contact_id)
+    except ValueError as e:
+        raise ValueError("Invalid sync token") from e
+
+
+def phone_e164(phone: str | None) -> str | None:
+    return to_e164(phone, settings.phone_country_code)
+
+
+def in_birthday_window(days: int, today: date | None = None):
+    """Contacts whose birthday falls in the next ``days`` days, by day of year."""
+    today = today or datetime.today()
+    upcoming_date = today + timedelta(days=days)
+    today_day_of_year = today.timetuple().tm_yday
+    upcoming_day_of_year = upcoming_date.timetuple().tm_yday
+    day_of_year = extract("doy", Contact.birthday)
+    if today_day_of_year <= upcoming_day_of_year:
+        return day_of_year.between(today_day_of_year, upcoming_day_of_year)
+    # The window wraps around the new year.
+    return or_(day_of_year >= today_day_of_year, day_of_year <= upcoming_day_of_year)
 
 
 class ContactsRepository:
     def __init__(self, session):
         self.session = session
 
-    def get_contacts(self, owner_id, limit: int = 10, offset: int = 0):
-        query = (
-            select(Contact)
-            .where(Contact.owner_id == owner_id)
-            .limit(limit)
-            .offset(offset)
-        )
-        results = self.session.execute(query)
-        return results.scalars().all()
+    def _changed(self, owner_id: int, action: str, contact_id: int):
+        contact_versions.bump(owner_id)
+        publish_contact_event(owner_id, action, contact_id)
 
-    def get_contacts_all(self, limit: int = 10, offset: int = 0):
-        query = select(Contact).limit(limit).offset(offset)
-        results = self.session.execute(query)
-        return results.scalars().all()
+    def _select(self, rows: bool):
+        # rows=True returns plain CONTACT_ROW_COLUMNS tuples for the fast
+        # serialization path instead of ORM objects.
+        if rows:
+            return select(*CONTACT_ROW_COLUMNS).join(Contact.owner)
+        return select(Contact)
+
+    def _fetch(self, query, rows: bool, params: dict | None = None):
+        results = self.session.execute(query, params)
+        return results.all() if rows else results.scalars().all()
+
+    def get_contacts(
+        self, owner_id, limit: int = 10, offset: int = 0, rows: bool = False
+    ):
+        query = CONTACT_ROWS_BY_OWNER if rows else CONTACTS_BY_OWNER
+        params = {"owner_id": owner_id, "limit": limit, "offset": offset}
+        return self._fetch(query, rows, params)
+
+    def get_contacts_all(self, limit: int = 10, offset: int = 0, rows: bool = False):
+        query = self._select(rows).where(is_live).limit(limit).offset(offset)
+        return self._fetch(query, rows)
 
     def create_contacts(self, contact: ContactsCreate, owner_id: int):
-        new_contact = Contact(**contact.model_dump(), owner_id=owner_id)
+        new_contact = Contact(
+            **contact.model_dump(),
+            phone_e164=phone_e164(contact.phone_number),
+            owner_id=owner_id,
+        )
         self.session.add(new_contact)
         self.session.commit()
         self.session.refresh(new_contact)  # To get the ID from the database
+        self._changed(owner_id, "created", new_contact.id)
         return new_contact
 
-    def search_contacts(self, owner_id, query):
+    def search_contacts(self, owner_id, query, rows: bool = False):
         q = (
-            select(Contact)
-            .where(Contact.owner_id == owner_id)
+            self._select(rows)
+            .where(Contact.owner_id == owner_id, is_live)
             .filter(
                 (Contact.first_name.ilike(f"%{query}%"))
                 | (Contact.last_name.ilike(f"%{query}%"))
                 | (Contact.email.ilike(f"%{query}%"))
             )
         )
-        results = self.session.execute(q)
-        return results.scalars().all()
+        return self._fetch(q, rows)
 
     def get_contact_by_id_and_owner(self, owner_id: int, contact_id: int):
-        q = select(Contact).where(
-            Contact.owner_id == owner_id, Contact.id == contact_id
+        result = self.session.execute(
+            CONTACT_BY_ID_AND_OWNER, {"owner_id": owner_id, "contact_id": contact_id}
         )
-        result = self.session.execute(q)
         return result.scalar_one_or_none()
 
     def get_contact_by_id(self, contact_id: int):
-        query = select(Contact).where(Contact.id == contact_id)
+        query = select(Contact).where(Contact.id == contact_id, is_live)
         result = self.session.execute(query)
         return result.scalar_one_or_none()
 
     def delete_contact(self, contact_id: int):
-        contact = self.session.get(Contact, contact_id)
+        contact = self.get_contact_by_id(contact_id)
         if contact:
-            self.session.delete(contact)
+            contact.deleted_at = func.now()
+            self.session.execute(
+                delete(ContactDuplicate).where(
+                    ContactDuplicate.owner_id == contact.owner_id,
+                    (ContactDuplicate.contact_id == contact_id)
+                    | (ContactDuplicate.duplicate_id == contact_id),
+                )
+            )
             self.session.commit()
+            self._changed(contact.owner_id, "deleted", contact_id)
 
     def get_upcoming_birthdays(self, owner_id: int, days: int = 7):
-        today = datetime.today()
-        upcoming_date = today + timedelta(days=days)
-        today_day_of_year = today.timetuple().tm_yday
-        upcoming_day_of_year = upcoming_date.timetuple().tm_yday
-
-        if today_day_of_year <= upcoming_day_of_year:
-            query = select(Contact).filter(
-                Contact.owner_id == owner_id,
-                extract("doy", Contact.birthday).between(
-                    today_day_of_year, upcoming_day_of_year
-                ),
-            )
-        else:
-            query = select(Contact).filter(
-                Contact.owner_id == owner_id,
-                or_(
-                    extract("doy", Contact.birthday) >= today_day_of_year,
-                    extract("doy", Contact.birthday) <= upcoming_day_of_year,
-                ),
-            )
-
+        query = select(Contact).filter(
+            Contact.owner_id == owner_id, is_live, in_birthday_window(days)
+        )
         results = self.session.execute(query)
         return results.scalars().all()
 
     def find_contact(self, owner_id: int, identifier: str):
-        try:
-            contact_id = int(identifier)
-        except ValueError:
-            contact_id = None
-
-        query = select(Contact).where(
-            Contact.owner_id == owner_id,
-            or_(
-                Contact.id == contact_id,
-                Contact.email == identifier,
+        # Each identifier kind gets its own predicate so Postgres can use the
+        # matching (owner_id, ...) index instead of scanning the owner's rows.
+        if identifier.isascii() and identifier.isdecimal():
+            if int(identifier) > MAX_CONTACT_ID:
+                return None
+            criteria = [Contact.id == int(identifier)]
+        elif "@" in identifier:
+            criteria = [Contact.email == identifier]
+        elif " " in identifier:
+            # A first name may itself contain a space ("Mary Ann").
+            criteria = [
+                contact_full_name == identifier,
                 Contact.first_name == identifier,
-                (Contact.first_name + " " + Contact.last_name) == identifier,
-            ),
-        )
-        result = self.session.execute(query)
-        return result.scalar_one_or_none()
+            ]
+        else:
+            criteria = [Contact.first_name == identifier]
+
+        for criterion in criteria:
+            query = (
+                select(Contact)
+                .where(Contact.owner_id == owner_id, is_live, criterion)
+                .limit(2)
+            )
+            contacts = self.session.execute(query).scalars().all()
+            if len(contacts) > 1:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Several contacts match this identifier, "
+                    "use the contact id or email instead",
+                )
+            if contacts:
+                return contacts[0]
+        return None
 
     def update_contact(
         self, identifier: str, owner_id: int, contact_update: ContactsCreate
@@ -114,18 +211,163 @@ class ContactsRepository:
 
         if contact_update.email:
             existing_contact = self.session.execute(
-                select(Contact).where(Contact.email == contact_update.email)
+                select(Contact).where(
+                    Contact.owner_id == owner_id,
+                    Contact.email == contact_update.email,
+                    is_live,
+                )
             ).scalar_one_or_none()
             if existing_contact and existing_contact.id != contact.id:
                 raise ValueError("Email already in use")
 
+        values = contact_update.model_dump(exclude_unset=True)
+        if "phone_number" in values:
+            values["phone_e164"] = phone_e164(values["phone_number"])
         stmt = (
             update(Contact)
-            .where(Contact.id == contact.id)
-            .values(contact_update.model_dump(exclude_unset=True))
+            .where(Contact.owner_id == owner_id, Contact.id == contact.id)
+            .values(values)
             .returning(Contact)
         )
         result = self.session.execute(stmt)
-        self.session.commit()
         updated_contact = result.scalar()
+        self.session.commit()
+        self._changed(owner_id, "updated", contact.id)
         return updated_contact
+
+    def find_by_phones(self, owner_id: int, phones: list[str]):
+        """Live contacts per requested number, through the phone_e164 index.
+
+        Returns ``{phone: (e164, [contacts])}``; ``e164`` is None for numbers
+        that can't be normalized.
+        """
+        normalized = {phone: phone_e164(phone) for phone in phones}
+        wanted = {e164 for e164 in normalized.values() if e164}
+        by_number = {}
+        if wanted:
+            query = select(Contact).where(
+                Contact.owner_id == owner_id,
+                is_live,
+                Contact.phone_e164.in_(wanted),
+            )
+            for contact in self.session.execute(query).scalars():
+                by_number.setdefault(contact.phone_e164, []).append(contact)
+        return {
+            phone: (e164, by_number.get(e164, [])) for phone, e164 in normalized.items()
+        }
+
+    def get_duplicates(self, owner_id: int, limit: int = 100):
+        # Pairs are only rebuilt by the dedupe job; until then either side
+        # may have been deleted or merged away.
+        kept, duplicate = aliased(Contact), aliased(Contact)
+        query = (
+            select(ContactDuplicate)
+            .join(
+                kept,
+                and_(
+                    kept.id == ContactDuplicate.contact_id,
+                    kept.owner_id == ContactDuplicate.owner_id,
+                ),
+            )
+            .join(
+                duplicate,
+                and_(
+                    duplicate.id == ContactDuplicate.duplicate_id,
+                    duplicate.owner_id == ContactDuplicate.owner_id,
+                ),
+            )
+            .where(
+                ContactDuplicate.owner_id == owner_id,
+                kept.deleted_at.is_(None),
+                duplicate.deleted_at.is_(None),
+            )
+            .order_by(ContactDuplicate.score.desc(), ContactDuplicate.contact_id)
+            .limit(limit)
+        )
+        return self.session.execute(query).scalars().all()
+
+    def merge_contacts(self, owner_id: int, contact_id: int, duplicate_ids: list[int]):
+        """Folds the duplicates into ``contact_id`` in one transaction.
+
+        The kept contact's fields win; notes of the duplicates are appended to
+        its ``additional_info``. Duplicates become tombstones, so delta sync
+        reports them as deleted.
+        """
+        duplicate_ids = set(duplicate_ids)
+        if contact_id in duplicate_ids:
+            raise ValueError("A contact can't be merged into itself")
+        ids = duplicate_ids | {contact_id}
+        # Rows are locked in id order, so concurrent merges can't deadlock.
+        contacts = (
+            self.session.execute(
+                select(Contact)
+                .where(Contact.owner_id == owner_id, Contact.id.in_(ids), is_live)
+                .order_by(Contact.id)
+                .with_for_update()
+            )
+            .scalars()
+            .all()
+        )
+        if len(contacts) != len(ids):
+            self.session.rollback()
+            return None
+
+        kept = next(contact for contact in contacts if contact.id == contact_id)
+        notes = [kept.additional_info] if kept.additional_info else []
+        for contact in contacts:
+            if contact is kept:
+                continue
+            if contact.additional_info and contact.additional_info not in notes:
+                notes.append(contact.additional_info)
+            contact.deleted_at = func.now()
+        kept.additional_info = "\n".join(notes) or None
+        self.session.execute(
+            delete(ContactDuplicate).where(
+                ContactDuplicate.owner_id == owner_id,
+                ContactDuplicate.contact_id.in_(duplicate_ids)
+                | ContactDuplicate.duplicate_id.in_(duplicate_ids),
+            )
+        )
+        self.session.commit()
+        self.session.refresh(kept)
+
+        self._changed(owner_id, "updated", contact_id)
+        for duplicate_id in sorted(duplicate_ids):
+            self._changed(owner_id, "deleted", duplicate_id)
+        return kept
+
+    def get_changes(self, owner_id: int, since: str | None = None, limit: int = 100):
+        """Contacts changed after ``since``, oldest first, tombstones included.
+
+        Rows are keyset-paged on ``(updated_at, id)`` through the
+        ``(owner_id, updated_at, id)`` index. Rows younger than
+        ``settings.sync_settle_seconds`` are held back so that a transaction
+        that started earlier but commits later can't slip behind the token.
+        """
+        query = select(Contact).where(
+            Contact.owner_id == owner_id,
+            Contact.updated_at
+            < func.now() - timedelta(seconds=settings.sync_settle_seconds),
+        )
+        if since is None:
+            query = query.where(is_live)
+        else:
+            query = query.where(
+                tuple_(Contact.updated_at, Contact.id) > decode_sync_token(since)
+            )
+        query = query.order_by(Contact.updated_at, Contact.id).limit(limit + 1)
+        contacts = self.session.execute(query).scalars().all()
+
+        has_more = len(contacts) > limit
+        contacts = contacts[:limit]
+        next_token = (
+            encode_sync_token(contacts[-1].updated_at, contacts[-1].id)
+            if contacts
+            else since
+        )
+        return {
+            "changes": [c for c in contacts if c.deleted_at is None],
+            "deleted": [c.id for c in contacts if c.deleted_at is not None],
+            "next_token": next_token,
+            "has_more": has_more,
+        }
@@ -1,15 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from fastapi_limiter.depends import RateLimiter
 
-from src.auth.schemas import RoleEnum
+from src.auth.schemas import RoleEnum, StreamToken
 from src.auth.models import User
-from src.auth.utils import RoleChecker, get_current_user
+from src.auth.utils import (
+    STREAM_TOKEN_EXPIRE_SECONDS,
+    RoleChecker,
+    create_stream_token,
+    get_current_user,
+)
 from config.db import get_db
+from config.general import settings
+from src.contacts.cache import ConditionalGet
+from src.contacts.events import get_stream_user_id, stream_contact_events
 from src.contacts.repo import ContactsRepository
-from src.contacts.schemas import ContactsCreate, ContactsResponse
+from src.contacts.schemas import (
+    ContactDuplicateResponse,
+    ContactsChanges,
+    ContactsCreate,
+    ContactsMerge,
+    ContactsResponse,
+    PhoneLookup,
+    PhoneMatch,
+)
+from src.contacts.serializers import contacts_response
+from src.core.negotiation import MessagePackRoute, wants_msgpack
+from src.core.resilience import FailOpenRateLimiter
 
-router = APIRouter()
+router = APIRouter(route_class=MessagePackRoute)
 
 
 @router.get("/ping")
@@ -22,7 +49,7 @@ def hello():
     response_model=ContactsResponse,
     dependencies=[
         Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
-        Depends(RateLimiter(times=10, seconds=60)),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
     ],
     status_code=status.HTTP_201_CREATED,
 )
@@ -40,16 +67,22 @@ def create_contacts(
     response_model=list[ContactsResponse],
     dependencies=[
         Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
-        Depends(RateLimiter(times=10, seconds=60)),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+        Depends(ConditionalGet()),
     ],
 )
 def get_contacts(
+    request: Request,
+    response: Response,
     limit: int = 10,
     offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     repo = ContactsRepository(db)
+    if settings.fast_json_responses:
+        rows = repo.get_contacts(current_user.id, limit, offset, rows=True)
+        return contacts_response(rows, response, wants_msgpack(request))
     return repo.get_contacts(current_user.id, limit, offset)
 
 
@@ -58,16 +91,21 @@ def get_contacts(
     response_model=list[ContactsResponse],
     dependencies=[
         Depends(RoleChecker([RoleEnum.ADMIN])),
-        Depends(RateLimiter(times=10, seconds=60)),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
     ],
     tags=["admin"],
 )
 def get_contacts_all(
+    request: Request,
+    response: Response,
     limit: int = 10,
     offset: int = 0,
     db: Session = Depends(get_db),
 ):
     repo = ContactsRepository(db)
+    if settings.fast_json_responses:
+        rows = repo.get_contacts_all(limit, offset, rows=True)
+        return contacts_response(rows, response, wants_msgpack(request))
     return repo.get_contacts_all(limit, offset)
 
 
@@ -76,18 +114,149 @@ def get_contacts_all(
     response_model=list[ContactsResponse],
     dependencies=[
         Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
-        Depends(RateLimiter(times=10, seconds=60)),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+        Depends(ConditionalGet()),
     ],
 )
 def search_contacts(
+    request: Request,
+    response: Response,
     query: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     repo = ContactsRepository(db)
+    if settings.fast_json_responses:
+        rows = repo.search_contacts(current_user.id, query, rows=True)
+        return contacts_response(rows, response, wants_msgpack(request))
     return repo.search_contacts(current_user.id, query)
 
 
+@router.get(
+    "/changes",
+    response_model=ContactsChanges,
+    dependencies=[
+        Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+    ],
+)
+def get_contact_changes(
+    since: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    repo = ContactsRepository(db)
+    try:
+        return repo.get_changes(current_user.id, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/by-phone",
+    response_model=list[ContactsResponse],
+    dependencies=[
+        Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+    ],
+)
+def get_contacts_by_phone(
+    phone: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    repo = ContactsRepository(db)
+    e164, contacts = repo.find_by_phones(current_user.id, [phone])[phone]
+    if e164 is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid phone number"
+        )
+    return contacts
+
+
+@router.post(
+    "/by-phone",
+    response_model=list[PhoneMatch],
+    dependencies=[
+        Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+    ],
+)
+def get_contacts_by_phones(
+    lookup: PhoneLookup,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # Resolves up to 1000 numbers with a single indexed query.
+    repo = ContactsRepository(db)
+    matches = repo.find_by_phones(current_user.id, lookup.phones)
+    return [
+        {"phone": phone, "phone_e164": e164, "contacts": contacts}
+        for phone, (e164, contacts) in matches.items()
+    ]
+
+
+@router.get(
+    "/duplicates",
+    response_model=list[ContactDuplicateResponse],
+    dependencies=[
+        Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+    ],
+)
+def get_duplicates(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    repo = ContactsRepository(db)
+    return repo.get_duplicates(current_user.id, limit)
+
+
+@router.post(
+    "/{contact_id}/merge",
+    response_model=ContactsResponse,
+    dependencies=[
+        Depends(RoleChecker([RoleEnum.USER, RoleEnum.ADMIN])),
+        Depends(FailOpenRateLimiter(times=10, seconds=60)),
+    ],
+)
+def merge_contacts(
+    contact_id: int,
+    merge: ContactsMerge,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    repo = ContactsRepository(db)
+    try:
+        contact = repo.merge_contacts(current_user.id, contact_id, merge.duplicate_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if contact is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found"
+        )
+    return contact
+
+
+@router.post("/stream-token", response_model=StreamToken)
+def create_events_stream_token(current_user: User = Depends(get_current_user)):
+    return {
+        "stream_token": create_stream_token(current_user.email, current_user.id),
+        "expires_in": STREAM_TOKEN_EXPIRE_SECONDS,
+    }
+
+
+@router.get("/events")
+async def stream_events(owner_id: int = Depends(get_stream_user_id)):
+    return StreamingResponse(
+        stream_contact_events(owner_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{contact_id}", dependencies=[Depends(RoleChecker([RoleEnum.ADMIN]))])
 def delete_contact(
     contact_id: int,
@@ -103,7 +272,10 @@ def delete_contact(
     return {"message": f"Contact {contact_id} deleted"}
 
 
-@router.get("/upcoming_birthdays/")
+@router.get(
+    "/upcoming_birthdays/",
+    dependencies=[Depends(get_current_user), Depends(ConditionalGet(daily=True))],
+)
 def get_upcoming_birthdays(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from src.auth.schemas import UserBase
 
 
@@ -21,6 +21,41 @@ class ContactsCreate(ContactsBase):
     pass
 
 
+class ContactsChange(ContactsResponse):
+    updated_at: datetime
+
+
+class ContactsChanges(BaseModel):
+    changes: list[ContactsChange]
+    deleted: list[int]
+    next_token: str | None
+    has_more: bool
+
+
+class PhoneLookup(BaseModel):
+    phones: list[str] = Field(min_length=1, max_length=1000)
+
+
+class PhoneMatch(BaseModel):
+    phone: str
+    phone_e164: str | None
+    contacts: list[ContactsResponse]
+
+
+class ContactDuplicateResponse(BaseModel):
+    contact_id: int
+    duplicate_id: int
+    score: float
+    reasons: str
+
+    class Config:
+        from_attributes = True
+
+
+class ContactsMerge(BaseModel):
+    duplicate_ids: list[int] = Field(min_length=1, max_length=100)
+
+
 # class ContactsUpdate(ContactsBase):
 #     done: bool
 
@@ -0,0 +1,79 @@
+import json
+
+from fastapi import Response
+
+from src.auth.models import User
+from src.contacts.models import Contact
+from src.core.negotiation import MSGPACK_MEDIA_TYPE, encode_default, packb
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Column order of the fast path; contact_row_to_dict unpacks rows positionally
+# and must produce the same JSON as ContactsResponse.
+CONTACT_ROW_COLUMNS = (
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone_number,
+    Contact.birthday,
+    Contact.additional_info,
+    Contact.id,
+    User.username.label("owner_username"),
+    User.email.label("owner_email"),
+)
+
+
+def contact_row_to_dict(row) -> dict:
+    (
+        first_name,
+        last_name,
+        email,
+        phone_number,
+        birthday,
+        additional_info,
+        contact_id,
+        owner_username,
+        owner_email,
+    ) = row
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": email,
+        "phone_number": phone_number,
+        "birthday": birthday,
+        "additional_info": additional_info,
+        "id": contact_id,
+        "owner": {"username": owner_username, "email": owner_email},
+    }
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=encode_default, separators=(",", ":")).encode()
+
+
+def contacts_response(
+    rows, response: Response | None = None, msgpack_format: bool = False
+) -> Response:
+    """Encodes ``CONTACT_ROW_COLUMNS`` rows without a Pydantic round trip.
+
+    Returning a ``Response`` skips FastAPI's ``response_model`` validation, so
+    the route keeps its ``response_model`` for the OpenAPI schema only.
+    Headers already set on the dependency ``response`` (e.g. ETag) are
+    carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key != "content-length"
+        }
+    content = [contact_row_to_dict(row) for row in rows]
+    if msgpack_format:
+        return Response(packb(content), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(dumps(content), media_type="application/json", headers=headers)
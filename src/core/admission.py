@@ -0,0 +1,172 @@
+"""Admission control: bounded concurrency per route group, shed the excess.
+
+Every request to a limited group takes one of the group's slots for its whole
+lifetime. When all slots are busy it waits in a bounded FIFO queue, but only
+if it can expect a slot within ``max_wait`` seconds (queue position times the
+group's average service time); otherwise, or when the queue is full, it gets
+503 with ``Retry-After`` straight away. Turning requests away early keeps a
+slow database from dragging every queued request past its client's timeout.
+
+Health checks, metrics and event streams are never limited.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from src.core.metrics import registry
+
+UNLIMITED_PATHS = ("/contacts/ping", "/metrics", "/contacts/events")
+
+queue_wait = registry.histogram(
+    "admission_queue_wait_seconds",
+    "Time requests spent waiting for an admission slot.",
+    ("group",),
+)
+rejected = registry.counter(
+    "admission_rejected_total",
+    "Requests turned away by admission control.",
+    ("group", "reason"),
+)
+in_flight_gauge = registry.gauge(
+    "admission_in_flight", "Requests holding an admission slot.", ("group",)
+)
+queued_gauge = registry.gauge(
+    "admission_queued", "Requests waiting for an admission slot.", ("group",)
+)
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGroup:
+    def __init__(self, name: str, limit: int, queue_size: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.service_time = 0.0  # Moving average of seconds per request.
+
+    def expected_wait(self) -> float:
+        return (len(self.waiters) + 1) * self.service_time / self.limit
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            return
+        if len(self.waiters) >= self.queue_size:
+            raise Rejected("queue_full", self.expected_wait())
+        if self.expected_wait() > self.max_wait:
+            raise Rejected("deadline", self.expected_wait())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        queued_gauge.set(len(self.waiters), group=self.name)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on.
+                self.release()
+            else:
+                waiter.cancel()
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise Rejected("timeout", self.expected_wait()) from None
+            raise
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter so newcomers can't
+        # overtake the queue.
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def record(self, elapsed: float) -> None:
+        self.service_time = (
+            0.9 * self.service_time + 0.1 * elapsed if self.service_time else elapsed
+        )
+
+
+def parse_limits(limits: str) -> dict[str, tuple[int, int]]:
+    """Parses ``"auth=4/16,contacts_read=8/32"`` into ``{group: (slots, queue)}``."""
+    result = {}
+    for item in limits.split(","):
+        name, sep, value = item.partition("=")
+        if not sep:
+            continue
+        slots, _, queue_size = value.partition("/")
+        slots, queue_size = int(slots), int(queue_size or 0)
+        if slots < 1 or queue_size < 0:
+            raise ValueError(
+                f"Admission limit {item.strip()!r} needs at least one slot "
+                "and a non-negative queue"
+            )
+        result[name.strip()] = (slots, queue_size)
+    return result
+
+
+def route_group(method: str, path: str) -> str | None:
+    if path.startswith(UNLIMITED_PATHS):
+        return None
+    if path.startswith("/auth"):
+        return "auth"
+    if path.startswith("/admin"):
+        return "admin"
+    if path.startswith("/contacts"):
+        return "contacts_read" if method in ("GET", "HEAD") else "contacts_write"
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limits: str, max_wait: float = 2.0):
+        self.app = app
+        self.groups = {
+            name: AdmissionGroup(name, slots, queue_size, max_wait)
+            for name, (slots, queue_size) in parse_limits(limits).items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        group = None
+        if scope["type"] == "http":
+            group = self.groups.get(route_group(scope["method"], scope["path"]))
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await group.acquire()
+        except Rejected as exc:
+            rejected.inc(group=group.name, reason=exc.reason)
+            response = JSONResponse(
+                {"detail": "Service is busy, try again later"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+        finally:
+            queued_gauge.set(len(group.waiters), group=group.name)
+
+        admitted = time.perf_counter()
+        queue_wait.observe(admitted - started, group=group.name)
+        in_flight_gauge.set(group.in_flight, group=group.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.record(time.perf_counter() - admitted)
+            group.release()
+            in_flight_gauge.set(group.in_flight, group=group.name)
@@ -0,0 +1,185 @@
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # A sync flush makes every chunk decodable on arrival, so streamed
+        # responses are not held back by the compressor.
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+# (compressor, level when the budget allows it, level when it doesn't)
+def build_encodings(gzip_level: int, brotli_quality: int) -> dict:
+    encodings = {"gzip": (GzipCompressor, gzip_level, 1)}
+    if brotli is not None:
+        encodings["br"] = (BrotliCompressor, brotli_quality, 0)
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, available) -> str | None:
+    best, best_q = None, 0.0
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if name not in available:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        # Prefer brotli over gzip when the client weights them equally.
+        if q > best_q or (q == best_q and name == "br"):
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """gzip/brotli response compression with a size threshold and CPU budget.
+
+    Bodies smaller than ``minimum_size`` are sent as is. Each encoding keeps a
+    running estimate of its cost per byte; when compressing a body at the
+    configured level would take longer than ``cpu_budget_ms`` the fastest
+    level is used instead. Streaming responses are compressed chunk by chunk
+    as they are produced.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        cpu_budget_ms: float = 5.0,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cpu_budget = cpu_budget_ms / 1000
+        self.encodings = build_encodings(gzip_level, brotli_quality)
+        self.seconds_per_byte = {name: 0.0 for name in self.encodings}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str, size: int | None):
+        factory, level, fast_level = self.encodings[encoding]
+        if (
+            size is not None
+            and size * self.seconds_per_byte[encoding] > self.cpu_budget
+        ):
+            level = fast_level
+        return factory(level)
+
+    def record_cost(self, encoding: str, size: int, elapsed: float) -> None:
+        if size:
+            previous = self.seconds_per_byte[encoding] or elapsed / size
+            self.seconds_per_byte[encoding] = 0.9 * previous + 0.1 * elapsed / size
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress.
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            if "content-encoding" in headers or (
+                not more_body and len(body) < self.middleware.minimum_size
+            ):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self.compressor = self.middleware.compressor(
+                self.encoding, None if more_body else len(body)
+            )
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            # The compressed bytes are a different representation.
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                headers["ETag"] = f"W/{headers['etag']}"
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(start)
+
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": self._compress(body, final=not more_body),
+                "more_body": more_body,
+            }
+        )
+
+    def _compress(self, body: bytes, final: bool) -> bytes:
+        started = time.perf_counter()
+        data = self.compressor.compress(body) if body else b""
+        if final:
+            data += self.compressor.finish()
+        self.middleware.record_cost(
+            self.encoding, len(body), time.perf_counter() - started
+        )
+        return data
@@ -0,0 +1,195 @@
+"""Structured JSON logging that never writes to stderr on the request path.
+
+``setup_logging`` installs a ``QueueHandler`` on the root logger; records are
+formatted and written by a ``QueueListener`` thread. Message arguments are
+interpolated by the listener too, so disabled or cheap log calls cost little
+more than a queue put. Every record carries the id of the request it was
+logged from (``RequestIdMiddleware``).
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.datastructures import MutableHeaders
+
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "request_id", default=None
+)
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``.
+# uvicorn adds an ANSI-coloured copy of its messages that is of no use here.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "request_id",
+    "color_message",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    # Handler filters run in the thread that logs, where the request's context
+    # variables are still visible; the listener thread can't see them.
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueues records without formatting them.
+
+    The stock ``QueueHandler.prepare`` renders the message in the calling
+    thread. Here only the traceback is rendered eagerly, since the frames it
+    points to are gone by the time the listener gets to it; interpolation of
+    ``msg % args`` is left to the listener, so arguments should not be
+    mutated after they are logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _QueueLogging:
+    def __init__(self):
+        self.handler: LazyQueueHandler | None = None
+        self.listener: QueueListener | None = None
+        self.output: logging.Handler | None = None
+
+    def start(self) -> None:
+        log_queue = queue.SimpleQueue()
+        self.handler.queue = log_queue
+        self.listener = QueueListener(
+            log_queue, self.output, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()  # Flushes whatever is still queued.
+            self.listener = None
+
+    def after_fork(self) -> None:
+        # The listener thread does not survive fork(), and the inherited queue
+        # may hold records the parent will write itself.
+        self.listener = None
+        self.start()
+
+
+_logging = _QueueLogging()
+
+
+def parse_levels(levels: str) -> dict[str, str]:
+    """Parses ``"sqlalchemy.engine=WARNING,src.auth=DEBUG"``."""
+    result = {}
+    for item in levels.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip():
+            result[name.strip()] = level.strip().upper()
+    return result
+
+
+def setup_logging(
+    level: str = "INFO", levels: str = "", stream=None, structured: bool = True
+) -> None:
+    """Configures the root logger once per process; later calls are no-ops."""
+    if _logging.handler is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(
+        JsonFormatter()
+        if structured
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+    handler = LazyQueueHandler(None)
+    handler.addFilter(RequestIdFilter())
+    _logging.handler, _logging.output = handler, output
+    _logging.start()
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    # uvicorn's default config gives its loggers their own stderr handlers.
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(name).handlers.clear()
+        logging.getLogger(name).propagate = True
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    atexit.register(stop_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_logging.after_fork)
+
+
+def stop_logging() -> None:
+    """Writes out queued records; call before ``os._exit``, which skips atexit."""
+    _logging.stop()
+
+
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestIdMiddleware:
+    """Tags each request with an id, taken from ``X-Request-ID`` if valid.
+
+    The id is echoed back in the response and attached to every record
+    logged while the request is handled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,90 @@
+import json
+from datetime import date
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+def media_type_weights(accept: str) -> dict[str, float]:
+    weights = {}
+    for item in accept.split(","):
+        media_type, *params = item.split(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[media_type] = max(weights.get(media_type, 0.0), q)
+    return weights
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client weights MessagePack at least as high as JSON.
+
+    Only an explicit MessagePack media type counts; wildcards keep JSON.
+    """
+    if msgpack is None:
+        return False
+    weights = media_type_weights(request.headers.get("accept", ""))
+    msgpack_q = max(weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_q = max(weights.get(media_type, 0.0) for media_type in JSON_MEDIA_TYPES)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def encode_default(value):
+    # Dates are the only non-native type in contact payloads.
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def packb(content) -> bytes:
+    return msgpack.packb(content, default=encode_default)
+
+
+class MessagePackRoute(APIRoute):
+    """Serves MessagePack instead of JSON when the client asks for it.
+
+    Endpoints that build their own payload (the fast list path) encode
+    MessagePack directly; any other JSON response is transcoded here.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            response = await handler(request)
+            if msgpack is None:
+                return response
+            if wants_msgpack(request) and response.media_type == "application/json":
+                headers = {
+                    key: value
+                    for key, value in response.headers.items()
+                    if key not in ("content-length", "content-type")
+                }
+                response = Response(
+                    packb(json.loads(response.body)),
+                    status_code=response.status_code,
+                    headers=headers,
+                    media_type=MSGPACK_MEDIA_TYPE,
+                    background=response.background,
+                )
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return route_handler
@@ -0,0 +1,210 @@
+"""On-demand sampling profiler for single requests.
+
+A request is profiled when it carries ``X-Profile: 1`` and ``authorize``
+accepts its bearer token, or when it is picked at ``sample_rate``. A
+background thread then snapshots stacks every ``interval`` seconds until the
+response is done:
+
+* the event loop thread, while the profiled request's task is the one
+  running on it;
+* threadpool threads executing project code (sync dependencies, endpoints,
+  repositories). Sync work of other requests running on the same worker at
+  the same moment cannot be told apart and is included too.
+
+Profiles are saved as collapsed stacks (``frame;frame;frame count``), which
+flamegraph.pl, speedscope and most flame graph viewers read, next to a JSON
+file with the request's metadata. Requests that are not profiled only pay
+for a header lookup.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+PROJECT_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+_labels: dict = {}
+
+
+def frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(PROJECT_ROOT):
+            filename = filename[len(PROJECT_ROOT) :]
+        elif "site-packages" + os.sep in filename:
+            filename = filename.split("site-packages" + os.sep, 1)[1]
+        label = _labels[code] = f"{filename}:{code.co_qualname}"
+    return label
+
+
+def collapse(frame) -> tuple[str, bool]:
+    """Returns the stack root first, and whether it runs any project code."""
+    labels, in_project = [], False
+    while frame is not None:
+        code = frame.f_code
+        labels.append(frame_label(code))
+        in_project = in_project or code.co_filename.startswith(PROJECT_ROOT)
+        frame = frame.f_back
+    return ";".join(reversed(labels)), in_project
+
+
+class RequestProfiler:
+    # A CPU-bound thread only hands the GIL over every switch interval (5 ms
+    # by default), which would cap the sampling rate; it is lowered while
+    # any profile is running.
+    _active = 0
+    _default_switch_interval = sys.getswitchinterval()
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        with self._lock:
+            RequestProfiler._active += 1
+            sys.setswitchinterval(min(self._default_switch_interval, self.interval))
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        # The sampler may be mid-snapshot; wait for it off the event loop.
+        await run_in_threadpool(self._thread.join)
+        with self._lock:
+            RequestProfiler._active -= 1
+            if not RequestProfiler._active:
+                sys.setswitchinterval(self._default_switch_interval)
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if thread_id == self.loop_thread:
+                    if asyncio.current_task(self.loop) is not self.task:
+                        continue
+                    stack, _ = collapse(frame)
+                else:
+                    stack, in_project = collapse(frame)
+                    if not in_project:
+                        continue  # Idle threadpool threads and the like.
+                self.stacks[stack] += 1
+
+
+class ProfileStore:
+    def __init__(self, directory: str, keep: int = 100):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile_id: str, metadata: dict, stacks: Counter) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+        (self.directory / f"{profile_id}.collapsed").write_text(collapsed)
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(metadata))
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob("*.json"))
+        for stale in profiles[: max(0, len(profiles) - self.keep)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def list(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        return [
+            json.loads(path.read_text())
+            for path in sorted(self.directory.glob("*.json"), reverse=True)
+        ]
+
+    def collapsed(self, profile_id: str) -> str | None:
+        # Ids are generated by save(); anything else can't name a profile.
+        if not profile_id.replace("-", "").isalnum():
+            return None
+        path = self.directory / f"{profile_id}.collapsed"
+        return path.read_text() if path.exists() else None
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        authorize,
+        sample_rate: float = 0.0,
+        interval_ms: float = 1.0,
+    ):
+        self.app = app
+        self.store = store
+        self.authorize = authorize  # Blocking callable: bearer token -> bool.
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self._triggered(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status_code = None
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profiler = RequestProfiler(self.interval)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            await profiler.stop()
+            metadata = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "samples": profiler.samples,
+                "interval_ms": self.interval * 1000,
+                "request_id": scope.get("state", {}).get("request_id"),
+            }
+            await run_in_threadpool(
+                self.store.save, profile_id, metadata, profiler.stacks
+            )
+
+    async def _triggered(self, scope) -> bool:
+        requested, token = False, None
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                requested = value == b"1"
+            elif key == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    token = None
+        if requested and token:
+            return await run_in_threadpool(self.authorize, token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
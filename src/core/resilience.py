@@ -0,0 +1,184 @@
+"""Timeouts and circuit breakers for calls to external services.
+
+A breaker opens after ``failure_threshold`` consecutive failures and then
+fails fast with ``CircuitOpen`` for ``reset_timeout`` seconds. After that one
+trial call is let through (half-open): success closes the breaker, failure
+opens it again. States are exported as the ``circuit_breaker_state`` gauge.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from fastapi_limiter import FastAPILimiter
+from fastapi_limiter.depends import RateLimiter
+from redis.exceptions import NoScriptError, RedisError
+
+from config.general import settings
+from src.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+breaker_state = registry.gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ("name",),
+)
+breaker_rejected = registry.counter(
+    "circuit_breaker_rejected_total",
+    "Calls failed fast because the circuit was open.",
+    ("name",),
+)
+breaker_failures = registry.counter(
+    "circuit_breaker_failures_total",
+    "Failed or timed out calls seen by a circuit breaker.",
+    ("name",),
+)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        breaker_state.set(0, name=name)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit %s is now %s", self.name, state)
+        self.state = state
+        breaker_state.set(STATE_VALUES[state], name=self.name)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                # Only one trial call at a time while the service recovers.
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        breaker_failures.inc(name=self.name)
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+    def _reject(self) -> CircuitOpen:
+        breaker_rejected.inc(name=self.name)
+        return CircuitOpen(self.name, self.retry_after())
+
+    def call(self, func, *args, **kwargs):
+        """Runs a blocking call; ``func`` must enforce ``self.timeout`` itself."""
+        if not self.allow():
+            raise self._reject()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        if not self.allow():
+            raise self._reject()
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), self.timeout)
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                with self._lock:
+                    self._trial_running = False
+            else:
+                self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+def make_breaker(name: str, timeout: float) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        timeout,
+        failure_threshold=settings.breaker_failure_threshold,
+        reset_timeout=settings.breaker_reset_seconds,
+    )
+
+
+cloudinary_breaker = make_breaker("cloudinary", settings.cloudinary_timeout)
+smtp_breaker = make_breaker("smtp", settings.smtp_timeout)
+rate_limit_breaker = make_breaker("rate_limit_redis", settings.redis_socket_timeout)
+# Contact versions (ETags) and change events; both are skipped while open.
+redis_breaker = make_breaker("redis", settings.redis_socket_timeout)
+
+
+class FailOpenRateLimiter(RateLimiter):
+    """``RateLimiter`` that lets requests through when Redis is unavailable.
+
+    Losing rate limiting for a while is better than failing every request
+    that passes through it. Redis calls are bounded by the breaker timeout.
+    """
+
+    async def _check(self, key):
+        try:
+            return await rate_limit_breaker.call_async(self._evaluate, key)
+        except (CircuitOpen, RedisError, OSError, asyncio.TimeoutError):
+            return 0
+
+    async def _evaluate(self, key):
+        if FastAPILimiter.lua_sha is None:
+            # Redis was down when the app started.
+            await self._load_script()
+        try:
+            return await super()._check(key)
+        except NoScriptError:
+            # Redis restarted and lost its script cache.
+            await self._load_script()
+            return await super()._check(key)
+
+    @staticmethod
+    async def _load_script() -> None:
+        FastAPILimiter.lua_sha = await FastAPILimiter.redis.script_load(
+            FastAPILimiter.lua_script
+        )
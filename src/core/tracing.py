@@ -0,0 +1,271 @@
+"""Lightweight request tracing.
+
+``TracingMiddleware`` samples requests (or joins the trace of a sampled W3C
+``traceparent`` header) and opens a root span; ``span()`` opens a child of
+whatever span is current in the calling context, and costs a context
+variable lookup when the request isn't sampled. Finished spans are written
+as JSON lines by a background thread, to a file (``file:/path``) or as UDP
+datagrams to a collector (``udp://host:port``).
+
+SQLAlchemy statements and commits and Redis commands are instrumented by
+``instrument_sqlalchemy`` and ``instrument_redis``; other slow calls (bcrypt,
+SMTP, Cloudinary, template rendering) wrap themselves in ``span()``.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from starlette.datastructures import MutableHeaders
+
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class SpanExporter:
+    """Writes finished spans from a background thread."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._queue: queue.SimpleQueue | None = None
+        self._pid = None
+
+    def export(self, span: dict) -> None:
+        if self._pid != os.getpid():
+            # First span in this process, or we are a freshly forked worker
+            # whose writer thread did not survive fork().
+            self._start()
+        self._queue.put(span)
+
+    def _start(self) -> None:
+        self._pid = os.getpid()
+        self._queue = queue.SimpleQueue()
+        threading.Thread(
+            target=self._write, args=(self._queue,), name="span-exporter", daemon=True
+        ).start()
+
+    def _write(self, spans: queue.SimpleQueue) -> None:
+        if self.target.startswith("udp:"):
+            address = urlsplit(self.target)
+            address = (address.hostname, address.port)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            while True:
+                data = json.dumps(spans.get(), default=str).encode()
+                try:
+                    sock.sendto(data, address)
+                except OSError:
+                    pass  # A missing collector must not break the app.
+        path = self.target.removeprefix("file:")
+        with open(path, "a", buffering=1) as output:
+            while True:
+                output.write(json.dumps(spans.get(), default=str) + "\n")
+
+
+class _Tracer:
+    exporter: SpanExporter | None = None
+    sample_rate = 0.0
+
+
+tracer = _Tracer()
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "error",
+        "_started",
+        "_token",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self.error = None
+        self._started = time.perf_counter()
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        if self._started is None:
+            return
+        duration = time.perf_counter() - self._started
+        self._started = None
+        if tracer.exporter is not None:
+            tracer.exporter.export(
+                {
+                    "trace_id": self.trace_id,
+                    "span_id": self.span_id,
+                    "parent_id": self.parent_id,
+                    "name": self.name,
+                    "start": self.start,
+                    "duration_ms": round(duration * 1000, 3),
+                    "error": self.error,
+                    "attributes": self.attributes,
+                }
+            )
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        self.end()
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """A child of the current span, or a no-op when nothing is being traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+
+def setup_tracing(sample_rate: float, target: str) -> None:
+    tracer.sample_rate = sample_rate
+    tracer.exporter = SpanExporter(target) if target else None
+
+
+def parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or tracer.exporter is None:
+            await self.app(scope, receive, send)
+            return
+        trace_id, parent_id, sampled = None, None, False
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                parsed = parse_traceparent(value.decode("latin-1"))
+                if parsed is not None:
+                    trace_id, parent_id, sampled = parsed
+                break
+        if not sampled and random.random() >= tracer.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            f"{scope['method']} {scope['path']}",
+            trace_id or os.urandom(16).hex(),
+            parent_id,
+            {"http.method": scope["method"], "http.path": scope["path"]},
+        )
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                MutableHeaders(scope=message)["X-Trace-Id"] = root.trace_id
+            await send(message)
+
+        with root:
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    # Group spans by route template rather than by raw path.
+                    root.name = f"{scope['method']} {route.path}"
+                state = scope.get("state", {})
+                if "request_id" in state:
+                    root.set_attribute("request_id", state["request_id"])
+
+
+def instrument_sqlalchemy(engine, session_factory) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span = span("db.query", statement=statement[:500])
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        execution_context = context.execution_context
+        trace_span = getattr(execution_context, "_trace_span", None)
+        if trace_span is not None:
+            trace_span.set_attribute("error", type(context.original_exception).__name__)
+            trace_span.end()
+
+    # Commit covers the flush and the COMMIT round trip.
+    @event.listens_for(session_factory, "before_commit")
+    def before_commit(session):
+        session.info["trace_commit"] = span("db.commit")
+
+    @event.listens_for(session_factory, "after_commit")
+    @event.listens_for(session_factory, "after_rollback")
+    def after_commit(session):
+        session.info.pop("trace_commit", NOOP_SPAN).end()
+
+
+def instrument_redis() -> None:
+    import redis
+    import redis.asyncio
+
+    if getattr(redis.Redis.execute_command, "_traced", False):
+        return
+    sync_execute = redis.Redis.execute_command
+    async_execute = redis.asyncio.Redis.execute_command
+
+    def execute_command(self, *args, **options):
+        with span(f"redis {args[0]}"):
+            return sync_execute(self, *args, **options)
+
+    async def execute_command_async(self, *args, **options):
+        with span(f"redis {args[0]}"):
+            return await async_execute(self, *args, **options)
+
+    execute_command._traced = execute_command_async._traced = True
+    redis.Redis.execute_command = execute_command
+    redis.asyncio.Redis.execute_command = execute_command_async
@@ -0,0 +1,57 @@
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.contacts import cache, events
+from src.contacts.cache import ContactVersionStore
+from src.core.resilience import OPEN, CircuitBreaker
+
+
+class HungRedis:
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+            raise RedisConnectionError("Timeout reading from socket")
+
+        return call
+
+
+@pytest.fixture
+def redis():
+    return HungRedis()
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(
+        "redis_test", timeout=0.5, failure_threshold=2, reset_timeout=30.0
+    )
+    monkeypatch.setattr(cache, "redis_breaker", breaker)
+    monkeypatch.setattr(events, "redis_breaker", breaker)
+    return breaker
+
+
+def test_failures_open_the_breaker(redis, breaker):
+    store = ContactVersionStore(redis_factory=lambda: redis)
+    assert store.get(1) is None
+    store.bump(1)
+    assert breaker.state == OPEN
+    assert redis.calls == 2
+
+
+def test_open_breaker_skips_redis(redis, breaker, monkeypatch):
+    store = ContactVersionStore(redis_factory=lambda: redis)
+    monkeypatch.setattr(events, "get_redis", lambda: redis)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    assert store.get(1) is None
+    store.bump(1)
+    events.publish_contact_event(1, "created", 2)
+
+    assert redis.calls == 0
+    # The skipped bump is replayed once Redis is back, so tags issued before
+    # the outage can't validate against the write.
+    assert store._pending == {1}
@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from fastapi_limiter import FastAPILimiter
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.core import resilience
+from src.core.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpen,
+    FailOpenRateLimiter,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise OSError("service down")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(OSError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        "test", timeout=1.0, failure_threshold=2, reset_timeout=10.0, clock=clock
+    )
+
+
+def test_opens_after_consecutive_failures(breaker):
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpen) as error:
+        breaker.call(calls.append, 1)
+    assert calls == []
+    assert error.value.retry_after == 10.0
+
+
+def test_success_resets_the_failure_count(breaker):
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_trial(breaker, clock):
+    trip(breaker)
+    clock.now = 9.9
+    assert not breaker.allow()
+
+    clock.now = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes(breaker, clock):
+    trip(breaker)
+    clock.now = 10.0
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+
+def test_failed_trial_opens_again(breaker, clock):
+    trip(breaker)
+    clock.now = 10.0
+    with pytest.raises(OSError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 10.0
+
+
+def test_async_timeout_counts_as_failure(breaker):
+    breaker.timeout = 0.01
+
+    async def hang():
+        await asyncio.sleep(1)
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(breaker.call_async(hang))
+    assert breaker.state == OPEN
+
+
+def test_cancelled_trial_frees_the_half_open_slot(breaker, clock):
+    trip(breaker)
+    clock.now = 10.0
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(breaker.call_async(cancelled))
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+class BrokenRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def script_load(self, script):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+    async def evalsha(self, *args):
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+
+@pytest.fixture
+def broken_redis(monkeypatch, clock):
+    redis = BrokenRedis()
+
+    async def identifier(request):
+        return "client"
+
+    async def http_callback(request, response, pexpire):
+        raise AssertionError("request was rate limited")
+
+    monkeypatch.setattr(FastAPILimiter, "redis", redis)
+    monkeypatch.setattr(FastAPILimiter, "lua_sha", None)
+    monkeypatch.setattr(FastAPILimiter, "prefix", "test")
+    monkeypatch.setattr(FastAPILimiter, "identifier", identifier)
+    monkeypatch.setattr(FastAPILimiter, "http_callback", http_callback)
+    monkeypatch.setattr(
+        resilience,
+        "rate_limit_breaker",
+        CircuitBreaker(
+            "rate_limit_test",
+            timeout=1.0,
+            failure_threshold=2,
+            reset_timeout=10.0,
+            clock=clock,
+        ),
+    )
+    return redis
+
+
+def test_rate_limiter_fails_open_when_redis_raises(broken_redis):
+    app = FastAPI()
+
+    @app.get("/", dependencies=[Depends(FailOpenRateLimiter(times=1, seconds=60))])
+    def index():
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        responses = [client.get("/") for _ in range(4)]
+
+    assert [response.status_code for response in responses] == [200] * 4
+    # Two failures open the circuit; later requests don't wait on Redis.
+    assert broken_redis.calls == 2
+    assert resilience.rate_limit_breaker.state == OPEN